@@ -5,6 +5,11 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from pathlib import Path
 
+# Files and directories modified more recently than this may change again
+# without their mtime moving on coarse filesystem clocks, so state cached
+# against such an mtime isn't trusted.
+MTIME_TRUST_MIN_AGE_NS = 2 * 1_000_000_000
+
 
 class Config:
     """
@@ -1,8 +1,10 @@
+import sys
 from datetime import datetime
 from enum import Enum
+from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 if TYPE_CHECKING:
     pass
@@ -14,7 +16,7 @@ class Prompt(BaseModel):
     tags: list[str] = Field(default_factory=list)
     metadata: dict[str, Any] = Field(default_factory=dict)
 
-    model_config = ConfigDict(use_enum_values=True)
+    model_config = ConfigDict(use_enum_values=True, frozen=True)
 
 
 class Checkpoint(BaseModel):
@@ -28,6 +30,13 @@ class Checkpoint(BaseModel):
     restore_timestamp: datetime | None = None
     metadata: dict[str, Any] = Field(default_factory=dict)
 
+    @field_validator("file_snapshots")
+    @classmethod
+    def _intern_file_snapshots(cls, value: dict[str, str]) -> dict[str, str]:
+        # Most files keep their path and hash from one checkpoint to the
+        # next; interning lets all loaded checkpoints share those strings.
+        return {sys.intern(path): sys.intern(h) for path, h in value.items()}
+
     @property
     def name(self) -> str:
         """Get a display name for the checkpoint.
@@ -42,7 +51,8 @@ class Checkpoint(BaseModel):
             )
         return f"Checkpoint {self.id}"
 
-    model_config = ConfigDict(use_enum_values=True)
+    # Loaded checkpoints are shared through the storage cache
+    model_config = ConfigDict(use_enum_values=True, frozen=True)
 
 
 class CodeChange(BaseModel):
@@ -53,6 +63,15 @@ class CodeChange(BaseModel):
     diff: Any | None = None
 
 
+class ProjectSnapshot(BaseModel):
+    """Files and modification times captured in a single project scan."""
+
+    files: dict[str, Path] = Field(default_factory=dict)  # relative -> absolute
+    mtimes: dict[str, float] = Field(default_factory=dict)
+
+    model_config = ConfigDict(frozen=True)
+
+
 class ExportFormat(str, Enum):
     MARKDOWN = "markdown"
     HTML = "html"
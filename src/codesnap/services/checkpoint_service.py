@@ -1,5 +1,10 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
+from ..config import MTIME_TRUST_MIN_AGE_NS
 from ..models import Checkpoint, Prompt
 from .interfaces import (
     CheckpointError,
@@ -11,6 +16,13 @@ from .interfaces import (
 if TYPE_CHECKING:
     pass
 
+# Reading, hashing and writing snapshots mostly release the GIL.
+MAX_IO_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Files snapshotted per executor task; most files are too small to be
+# worth scheduling one at a time.
+SNAPSHOT_BATCH_SIZE = 64
+
 
 class CheckpointService(ICheckpointService):
     """Manages checkpoint operations.
@@ -32,6 +44,8 @@ class CheckpointService(ICheckpointService):
         """
         self._storage = storage_manager
         self._file_service = file_service
+        # Last snapshot hash per file, with the (mtime_ns, size) it was read at
+        self._file_hashes: dict[Path, tuple[int, int, str]] = {}
 
     @property
     def file_service(self) -> IFileService:
@@ -72,15 +86,23 @@ class CheckpointService(ICheckpointService):
                 tags=tags or [],
             )
 
-            # Capture file snapshots
+            # Capture file snapshots, overlapping reads and writes
             project_files = self._file_service.get_project_files()
-
-            for file_path in project_files:
-                relative_path = file_path.relative_to(self.project_root)
-                content = self._file_service.read_file_content(file_path)
-                if content is not None:
-                    content_hash = self._storage.save_file_snapshot(content)
-                    checkpoint.file_snapshots[str(relative_path)] = content_hash
+            batches = [
+                project_files[i : i + SNAPSHOT_BATCH_SIZE]
+                for i in range(0, len(project_files), SNAPSHOT_BATCH_SIZE)
+            ]
+            if len(batches) > 1:
+                with ThreadPoolExecutor(max_workers=MAX_IO_WORKERS) as executor:
+                    results = list(executor.map(self._snapshot_batch, batches))
+            else:
+                results = [self._snapshot_batch(batch) for batch in batches]
+
+            for batch, hashes in zip(batches, results, strict=True):
+                for file_path, content_hash in zip(batch, hashes, strict=True):
+                    if content_hash is not None:
+                        relative_path = file_path.relative_to(self.project_root)
+                        checkpoint.file_snapshots[str(relative_path)] = content_hash
 
             # Save the checkpoint
             self._storage.save_checkpoint(checkpoint)
@@ -93,6 +115,39 @@ class CheckpointService(ICheckpointService):
                 service_name="CheckpointService",
             ) from e
 
+    def _snapshot_batch(self, file_paths: list[Path]) -> list[str | None]:
+        """Save snapshots of a batch of files.
+
+        Returns:
+            Each file's content hash, or None if it couldn't be read
+        """
+        return [self._snapshot_file(file_path) for file_path in file_paths]
+
+    def _snapshot_file(self, file_path: Path) -> str | None:
+        """Save a snapshot of a file, reusing its last hash if it is unchanged.
+
+        Returns:
+            The file's content hash, or None if it couldn't be read
+        """
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            st = None
+        if st is not None:
+            cached = self._file_hashes.get(file_path)
+            if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+                return cached[2]
+
+        content = self._file_service.read_file_content(file_path)
+        if content is None:
+            return None
+        content_hash = self._storage.save_file_snapshot(content)
+
+        # Stat'ing before the read means a later edit always changes the key
+        if st is not None and st.st_mtime_ns < time.time_ns() - MTIME_TRUST_MIN_AGE_NS:
+            self._file_hashes[file_path] = (st.st_mtime_ns, st.st_size, content_hash)
+        return content_hash
+
     def create_initial_checkpoint(
         self, description: str = "Initial checkpoint"
     ) -> Checkpoint:
@@ -1,6 +1,15 @@
-from typing import TYPE_CHECKING
+import contextlib
+import os
+import time
+from collections import Counter, deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from operator import itemgetter
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TypeVar
 
-from ..models import CodeChange
+from ..config import MTIME_TRUST_MIN_AGE_NS
+from ..models import CodeChange, ProjectSnapshot
 from .interfaces import (
     ComparisonError,
     IComparisonService,
@@ -11,6 +20,74 @@ from .interfaces import (
 if TYPE_CHECKING:
     pass
 
+# Content loads are file I/O, which releases the GIL.
+MAX_IO_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Files loaded per thread pool task.
+LOAD_BATCH_SIZE = 32
+
+# Batches loaded ahead of the comparison consuming them, which bounds the
+# file contents held in memory at once.
+PREFETCH_BATCHES = MAX_IO_WORKERS * 2
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def _build_change(
+    file_path: str,
+    old_content: str | None,
+    new_content: str | None,
+    diff_func: Callable[[str, str], Any],
+    include_content: bool = False,
+) -> CodeChange | None:
+    """Build a CodeChange from two versions of a file's content.
+
+    Args:
+        file_path: Relative path of the file being compared
+        old_content: Previous content, or None if the file did not exist
+        new_content: Current content, or None if the file does not exist
+        diff_func: Callable producing a diff from two content strings
+        include_content: Whether to keep the old and new content on the change.
+            When False only the diff is stored, so large files are not held
+            in memory three times over.
+
+    Returns:
+        The detected change, or None if the contents are identical
+    """
+    # Always compare actual content, not just hashes
+    if old_content is not None and new_content is not None:
+        # File exists in both versions, compare content
+        if old_content == new_content:
+            return None  # No change
+        # File modified
+        return CodeChange(
+            file_path=file_path,
+            change_type="modified",
+            old_content=old_content if include_content else None,
+            new_content=new_content if include_content else None,
+            diff=diff_func(old_content, new_content),
+        )
+    elif old_content is not None and new_content is None:
+        # File deleted
+        return CodeChange(
+            file_path=file_path,
+            change_type="deleted",
+            old_content=old_content if include_content else None,
+            new_content=None,
+            diff=diff_func(old_content, ""),
+        )
+    elif old_content is None and new_content is not None:
+        # File added
+        return CodeChange(
+            file_path=file_path,
+            change_type="added",
+            old_content=None,
+            new_content=new_content if include_content else None,
+            diff=diff_func("", new_content),
+        )
+    return None
+
 
 class ComparisonService(IComparisonService):
     """Compares checkpoints and generates differences.
@@ -32,6 +109,78 @@ class ComparisonService(IComparisonService):
         """
         self.storage = storage
         self.file_system = file_system
+        # Last hash per current file, with the (mtime_ns, size) it was read at
+        self._file_hashes: dict[Path, tuple[int, int, str]] = {}
+
+    def _current_hash(self, file_path: Path) -> str:
+        """Hash a project file, reusing its last hash if it is unchanged."""
+        st = os.stat(file_path)
+        cached = self._file_hashes.get(file_path)
+        if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+            return cached[2]
+
+        content_hash = self.storage.hash_file(file_path)
+        # Stat'ing before the read means a later edit always changes the key
+        if st.st_mtime_ns < time.time_ns() - MTIME_TRUST_MIN_AGE_NS:
+            self._file_hashes[file_path] = (st.st_mtime_ns, st.st_size, content_hash)
+        return content_hash
+
+    def _snapshot_loader(
+        self, content_hashes: Iterable[str | None]
+    ) -> Callable[[str | None], str | None]:
+        """Get a snapshot loader that reads each shared hash only once.
+
+        Identical files, such as empty `__init__.py` modules, share a hash.
+        Only hashes occurring more than once in `content_hashes` are kept in
+        memory, so unique snapshots are still freed after use.
+
+        Args:
+            content_hashes: Hashes the loader will be asked for
+
+        Returns:
+            A function mapping a content hash to its snapshot content, or
+            None for a missing hash
+        """
+        counts = Counter(h for h in content_hashes if h)
+        shared: dict[str, str | None] = {}
+
+        def load(content_hash: str | None) -> str | None:
+            if not content_hash:
+                return None
+            if counts[content_hash] < 2:
+                return self.storage.load_file_snapshot(content_hash)
+            if content_hash not in shared:
+                shared[content_hash] = self.storage.load_file_snapshot(content_hash)
+            return shared[content_hash]
+
+        return load
+
+    def _prefetch(self, load_one: Callable[[T], R], items: list[T]) -> Iterator[R]:
+        """Apply `load_one` to each item on a thread pool, in order.
+
+        Args:
+            load_one: Loads the contents for one item
+            items: Items to load
+
+        Yields:
+            The result for each item, in the order of `items`
+        """
+        if len(items) <= LOAD_BATCH_SIZE:
+            yield from map(load_one, items)
+            return
+
+        def load_batch(batch: list[T]) -> list[R]:
+            return [load_one(item) for item in batch]
+
+        with ThreadPoolExecutor(max_workers=MAX_IO_WORKERS) as executor:
+            pending: deque[Future[list[R]]] = deque()
+            for i in range(0, len(items), LOAD_BATCH_SIZE):
+                batch = items[i : i + LOAD_BATCH_SIZE]
+                pending.append(executor.submit(load_batch, batch))
+                if len(pending) > PREFETCH_BATCHES:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
 
     def _compare_files(
         self,
@@ -39,20 +188,18 @@ class ComparisonService(IComparisonService):
         old_content_hash: str | None,
         new_content_hash: str | None,
         use_rich: bool = False,
+        include_content: bool = False,
+        load: Callable[[str | None], str | None] | None = None,
     ) -> CodeChange | None:
+        if load is None:
+            load = self._snapshot_loader(())
         try:
-            old_content = (
-                self.storage.load_file_snapshot(old_content_hash)
-                if old_content_hash
-                else None
-            )
-            new_content = (
-                self.storage.load_file_snapshot(new_content_hash)
-                if new_content_hash
-                else None
-            )
+            old_content = load(old_content_hash)
+            new_content = load(new_content_hash)
 
-            return self._compare_content(file_path, old_content, new_content, use_rich)
+            return self._compare_content(
+                file_path, old_content, new_content, use_rich, include_content
+            )
         except Exception as e:
             raise ComparisonError(
                 f"Failed to compare files for '{file_path}': {str(e)}",
@@ -65,63 +212,49 @@ class ComparisonService(IComparisonService):
         old_content: str | None,
         new_content: str | None,
         use_rich: bool = False,
+        include_content: bool = False,
     ) -> CodeChange | None:
         try:
-
-            def make_diff(a: str, b: str):
-                diff_func = (
-                    self.file_system.generate_diff_rich
-                    if use_rich
-                    else self.file_system.generate_diff
-                )
-                return diff_func(a, b)
-
-            # Always compare actual content, not just hashes
-            if old_content is not None and new_content is not None:
-                # File exists in both versions, compare content
-                if old_content == new_content:
-                    return None  # No change
-                else:
-                    # File modified
-                    diff = make_diff(old_content, new_content)
-                    return CodeChange(
-                        file_path=file_path,
-                        change_type="modified",
-                        old_content=old_content,
-                        new_content=new_content,
-                        diff=diff,
-                    )
-            elif old_content is not None and new_content is None:
-                # File deleted
-                diff = make_diff(old_content, "")
-                return CodeChange(
-                    file_path=file_path,
-                    change_type="deleted",
-                    old_content=old_content,
-                    new_content=None,
-                    diff=diff,
-                )
-            elif old_content is None and new_content is not None:
-                # File added
-                diff = make_diff("", new_content)
-                return CodeChange(
-                    file_path=file_path,
-                    change_type="added",
-                    old_content=None,
-                    new_content=new_content,
-                    diff=diff,
-                )
-            return None
+            return _build_change(
+                file_path,
+                old_content,
+                new_content,
+                self._diff_func(use_rich),
+                # Rich diffs are only ever rendered, never the raw contents
+                include_content and not use_rich,
+            )
         except Exception as e:
             raise ComparisonError(
                 f"Failed to compare content for '{file_path}': {str(e)}",
                 service_name="ComparisonService",
             ) from e
 
+    def _diff_func(self, use_rich: bool) -> Callable[[str, str], Any]:
+        return (
+            self.file_system.generate_diff_rich
+            if use_rich
+            else self.file_system.generate_diff
+        )
+
     def compare_checkpoints(
-        self, checkpoint1_id: int, checkpoint2_id: int, use_rich: bool = False
+        self,
+        checkpoint1_id: int,
+        checkpoint2_id: int,
+        use_rich: bool = False,
+        include_content: bool = False,
     ) -> list[CodeChange]:
-        """Compare two checkpoints and return the differences."""
+        """Compare two checkpoints and return the differences.
+
+        Args:
+            checkpoint1_id: ID of the older checkpoint
+            checkpoint2_id: ID of the newer checkpoint
+            use_rich: Whether to generate rich Text diffs
+            include_content: Whether to keep old/new file contents on each
+                change. Ignored for rich diffs, which only need the diff.
+
+        Returns:
+            List of detected changes, sorted by file path
+        """
         try:
             checkpoint1 = self.storage.load_checkpoint(int(checkpoint1_id))
             checkpoint2 = self.storage.load_checkpoint(int(checkpoint2_id))
@@ -133,16 +266,35 @@ class ComparisonService(IComparisonService):
                     service_name="ComparisonService",
                 )
 
-            changes = []
-            all_files = set(checkpoint1.file_snapshots.keys()) | set(
-                checkpoint2.file_snapshots.keys()
-            )
-
-            for file_path in all_files:
-                hash1 = checkpoint1.file_snapshots.get(file_path)
-                hash2 = checkpoint2.file_snapshots.get(file_path)
+            # Partition up front so files with identical hashes are never loaded
+            old_files = checkpoint1.file_snapshots
+            new_files = checkpoint2.file_snapshots
+            if old_files == new_files:
+                return []
+            deleted: list[tuple[str, str | None, str | None]] = [
+                (file_path, old_files[file_path], None)
+                for file_path in old_files.keys() - new_files.keys()
+            ]
+            added: list[tuple[str, str | None, str | None]] = [
+                (file_path, None, new_files[file_path])
+                for file_path in new_files.keys() - old_files.keys()
+            ]
+            modified: list[tuple[str, str | None, str | None]] = [
+                (file_path, old_files[file_path], new_files[file_path])
+                for file_path in old_files.keys() & new_files.keys()
+                if old_files[file_path] != new_files[file_path]
+            ]
+            # The set partitions are unordered, so report in path order
+            candidates = sorted(deleted + added + modified, key=itemgetter(0))
 
-                change = self._compare_files(file_path, hash1, hash2, use_rich)
+            load = self._snapshot_loader(
+                h for _, old, new in candidates for h in (old, new)
+            )
+            changes = []
+            for file_path, hash1, hash2 in candidates:
+                change = self._compare_files(
+                    file_path, hash1, hash2, use_rich, include_content, load
+                )
                 if change:
                     changes.append(change)
 
@@ -158,9 +310,25 @@ class ComparisonService(IComparisonService):
             ) from e
 
     def compare_with_current(
-        self, checkpoint_id: int, use_rich: bool = False
+        self,
+        checkpoint_id: int,
+        use_rich: bool = False,
+        include_content: bool = False,
+        snapshot: ProjectSnapshot | None = None,
     ) -> list[CodeChange]:
-        """Compare a checkpoint with the current project state."""
+        """Compare a checkpoint with the current project state.
+
+        Args:
+            checkpoint_id: ID of the checkpoint to compare against
+            use_rich: Whether to generate rich Text diffs
+            include_content: Whether to keep old/new file contents on each
+                change. Ignored for rich diffs, which only need the diff.
+            snapshot: Optional project snapshot to reuse instead of scanning
+                the project again
+
+        Returns:
+            List of detected changes, sorted by file path
+        """
         try:
             checkpoint = self.storage.load_checkpoint(int(checkpoint_id))
             if not checkpoint:
@@ -170,33 +338,46 @@ class ComparisonService(IComparisonService):
                 )
 
             changes = []
-            current_files = {
-                str(f.relative_to(self.file_system.project_root)): f
-                for f in self.file_system.get_project_files()
-            }
+            current_files = (
+                snapshot.files
+                if snapshot is not None
+                else {
+                    str(f.relative_to(self.file_system.project_root)): f
+                    for f in self.file_system.get_project_files()
+                }
+            )
             all_files = set(checkpoint.file_snapshots.keys()) | set(
                 current_files.keys()
             )
+            load = self._snapshot_loader(checkpoint.file_snapshots.values())
 
-            for file_path in all_files:
-                checkpoint_hash = checkpoint.file_snapshots.get(file_path)
+            def load_pair(file_path: str) -> tuple[str, str | None, str | None]:
+                content_hash = checkpoint.file_snapshots.get(file_path)
                 current_file = current_files.get(file_path)
+                # Files still matching their snapshot hash need no contents
+                if content_hash and current_file:
+                    with contextlib.suppress(OSError):
+                        if self._current_hash(current_file) == content_hash:
+                            return file_path, None, None
 
                 # Load checkpoint content from storage
-                checkpoint_content = (
-                    self.storage.load_file_snapshot(checkpoint_hash)
-                    if checkpoint_hash
-                    else None
-                )
+                checkpoint_content = load(content_hash)
                 # Load current content from filesystem
                 current_content = (
                     self.file_system.read_file_content(current_file)
                     if current_file
                     else None
                 )
+                return file_path, checkpoint_content, current_content
 
+            loaded = self._prefetch(load_pair, sorted(all_files))
+            for file_path, checkpoint_content, current_content in loaded:
                 change = self._compare_content(
-                    file_path, checkpoint_content, current_content, use_rich
+                    file_path,
+                    checkpoint_content,
+                    current_content,
+                    use_rich,
+                    include_content,
                 )
                 if change:
                     changes.append(change)
@@ -1,11 +1,34 @@
+import contextlib
+import os
+import time
+from pathlib import Path
 from typing import TYPE_CHECKING
 
 from ..config import Config
+from ..models import ProjectSnapshot
 from .interfaces import FileServiceError, IFileMonitorService, IFileService
 
+try:
+    from inotify_simple import INotify, flags
+except ImportError:  # Optional "fast" extra, Linux only; fall back to polling
+    INotify = None
+
 if TYPE_CHECKING:
     from ..config import Config
 
+# Seconds a full project scan stays fresh before it is repeated.
+CHECK_INTERVAL = 0.25
+
+if INotify is not None:
+    WATCH_FLAGS = (
+        flags.MODIFY
+        | flags.ATTRIB
+        | flags.CREATE
+        | flags.DELETE
+        | flags.MOVED_TO
+        | flags.MOVED_FROM
+    )
+
 
 class FileMonitorService(IFileMonitorService):
     """
@@ -13,6 +36,9 @@ class FileMonitorService(IFileMonitorService):
 
     This service tracks file modifications during a coding session
     and can report which files have been changed since monitoring started.
+    On Linux with `inotify_simple` installed, changes are collected from
+    kernel events; otherwise the project is rescanned and compared by
+    modification time.
     """
 
     def __init__(self, config: Config, file_service: IFileService):
@@ -29,6 +55,9 @@ class FileMonitorService(IFileMonitorService):
         self.is_monitoring = False
         self.initial_file_states: dict[str, float] = {}  # path -> modification time
         self.changed_files: set[str] = set()
+        self._last_check_ts: float | None = None
+        self._inotify: INotify | None = None
+        self._watched_dirs: dict[int, Path] = {}  # watch descriptor -> directory
 
     def start_monitoring(self) -> None:
         """Start monitoring file changes in the project directory.
@@ -39,15 +68,15 @@ class FileMonitorService(IFileMonitorService):
         try:
             self.is_monitoring = True
             self.changed_files = set()
+            self._last_check_ts = None
 
-            # Capture initial file states
-            project_files = self.file_service.get_project_files()
-            for file_path in project_files:
-                relative_path = str(file_path.relative_to(self.project_root))
+            # Start watching before capturing states so no change is missed
+            self._start_watching()
 
-                mod_time = file_path.stat().st_mtime
-                self.initial_file_states[relative_path] = mod_time
+            # Capture initial file states
+            self.initial_file_states = dict(self.file_service.snapshot().mtimes)
         except Exception as e:
+            self._stop_watching()
             raise FileServiceError(
                 f"Failed to start file monitoring: {str(e)}",
                 service_name="FileMonitorService",
@@ -64,10 +93,9 @@ class FileMonitorService(IFileMonitorService):
             FileServiceError: If monitoring stop fails
         """
         try:
-            self.is_monitoring = False
-
             # Check for final changes
-            self._check_for_changes()
+            self._check_for_changes(force=True)
+            self.is_monitoring = False
 
             return self.changed_files.copy()
         except Exception as e:
@@ -75,45 +103,162 @@ class FileMonitorService(IFileMonitorService):
                 f"Failed to stop file monitoring: {str(e)}",
                 service_name="FileMonitorService",
             ) from e
+        finally:
+            self._stop_watching()
 
-    def _check_for_changes(self) -> None:
-        if not self.is_monitoring:
+    def _start_watching(self) -> None:
+        if INotify is None:
             return
 
         try:
-            project_files = self.file_service.get_project_files()
+            self._inotify = INotify()
+            self._watch_tree(self.project_root)
+        except OSError:
+            # e.g. the inotify watch limit was reached; poll instead
+            self._stop_watching()
+
+    def _stop_watching(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+        self._inotify = None
+        self._watched_dirs = {}
 
-            # Check for modifications to existing files
-            for file_path in project_files:
-                relative_path = str(file_path.relative_to(self.project_root))
+    def _watch_tree(self, root: Path) -> None:
+        assert self._inotify is not None
+        for dir_path, dir_names, _ in os.walk(root):
+            directory = Path(dir_path)
+            dir_names[:] = [
+                name
+                for name in dir_names
+                if not self.file_service.is_ignored(directory / name)
+            ]
+            wd = self._inotify.add_watch(directory, WATCH_FLAGS)
+            self._watched_dirs[wd] = directory
 
-                # Skip files we weren't tracking initially
-                if relative_path not in self.initial_file_states:
-                    # This is a new file
-                    self.changed_files.add(relative_path)
-                    continue
+    def _unwatch_tree(self, root: Path) -> None:
+        assert self._inotify is not None
+        for wd, directory in list(self._watched_dirs.items()):
+            if directory.is_relative_to(root):
+                del self._watched_dirs[wd]
+                with contextlib.suppress(OSError):
+                    self._inotify.rm_watch(wd)
 
-                current_mod_time = file_path.stat().st_mtime
-                initial_mod_time = self.initial_file_states[relative_path]
+    def _check_for_changes(
+        self, force: bool = False, snapshot: ProjectSnapshot | None = None
+    ) -> None:
+        if not self.is_monitoring:
+            return
 
-                if current_mod_time > initial_mod_time:
-                    self.changed_files.add(relative_path)
+        if self._inotify is not None and snapshot is None:
+            try:
+                self._read_events()
+            except Exception as e:
+                raise FileServiceError(
+                    f"Failed to check for file changes: {str(e)}",
+                    service_name="FileMonitorService",
+                ) from e
+            return
+
+        # Skip the full scan if one ran recently
+        now = time.monotonic()
+        if (
+            snapshot is None
+            and not force
+            and self._last_check_ts is not None
+            and now - self._last_check_ts < CHECK_INTERVAL
+        ):
+            return
 
-            # Check for deleted files
-            for relative_path in self.initial_file_states:
-                file_path = self.project_root / relative_path
-                if not file_path.exists():
-                    self.changed_files.add(relative_path)
+        try:
+            self._scan_for_changes(snapshot)
+            self._last_check_ts = now
         except Exception as e:
             raise FileServiceError(
                 f"Failed to check for file changes: {str(e)}",
                 service_name="FileMonitorService",
             ) from e
 
-    def get_changed_files(self) -> set[str]:
+    def _scan_for_changes(self, snapshot: ProjectSnapshot | None = None) -> None:
+        if snapshot is None:
+            snapshot = self.file_service.snapshot()
+
+        # Check for modifications to existing files
+        for relative_path, current_mod_time in snapshot.mtimes.items():
+            initial_mod_time = self.initial_file_states.get(relative_path)
+
+            # Files we weren't tracking initially are new
+            if initial_mod_time is None or current_mod_time > initial_mod_time:
+                self.changed_files.add(relative_path)
+
+        # Check for deleted files
+        for relative_path in self.initial_file_states:
+            if relative_path not in snapshot.mtimes:
+                self.changed_files.add(relative_path)
+
+    def _read_events(self) -> None:
+        assert self._inotify is not None
+        overflowed = False
+
+        for event in self._inotify.read(timeout=0):
+            if event.mask & flags.Q_OVERFLOW:
+                overflowed = True
+                continue
+            if event.mask & flags.IGNORED:
+                # Watched directory was removed
+                self._watched_dirs.pop(event.wd, None)
+                continue
+
+            directory = self._watched_dirs.get(event.wd)
+            if directory is None or not event.name:
+                continue
+            path = directory / event.name
+            if self.file_service.is_ignored(path):
+                continue
+            relative_path = str(path.relative_to(self.project_root))
+            removed = event.mask & (flags.DELETE | flags.MOVED_FROM)
+
+            if event.mask & flags.ISDIR:
+                if removed:
+                    prefix = relative_path + os.sep
+                    self.changed_files.update(
+                        p for p in self.initial_file_states if p.startswith(prefix)
+                    )
+                    if event.mask & flags.MOVED_FROM:
+                        # Moved directories keep their watches, which would
+                        # report events under the old path
+                        self._unwatch_tree(path)
+                else:
+                    # New directory: watch it and pick up files already inside
+                    try:
+                        self._watch_tree(path)
+                    except OSError:
+                        # e.g. it was removed again or the watch limit was
+                        # reached; poll from here on
+                        self._stop_watching()
+                        self._scan_for_changes()
+                        return
+                    self.changed_files.update(
+                        str(f.relative_to(self.project_root))
+                        for f in self.file_service.get_project_files(root=path)
+                    )
+            elif removed and relative_path not in self.initial_file_states:
+                # Created and removed during the session
+                self.changed_files.discard(relative_path)
+            else:
+                self.changed_files.add(relative_path)
+
+        if overflowed:
+            # Events were dropped by the kernel; fall back to a full scan
+            self._scan_for_changes()
+
+    def get_changed_files(self, snapshot: ProjectSnapshot | None = None) -> set[str]:
         """
         Get the current set of changed files.
 
+        Args:
+            snapshot: Optional project snapshot to reuse instead of scanning
+                the project again
+
         Returns:
             Set of relative file paths that have been modified
 
@@ -121,7 +266,7 @@ class FileMonitorService(IFileMonitorService):
             FileServiceError: If file change retrieval fails
         """
         try:
-            self._check_for_changes()
+            self._check_for_changes(force=True, snapshot=snapshot)
             return self.changed_files.copy()
         except Exception as e:
             raise FileServiceError(
@@ -139,5 +284,21 @@ class FileMonitorService(IFileMonitorService):
         Returns:
             True if the file has been modified, False otherwise
         """
+        if relative_path in self.changed_files or not self.is_monitoring:
+            return relative_path in self.changed_files
+
+        # Tracked files only need a single stat, not a project scan
+        initial_mod_time = self.initial_file_states.get(relative_path)
+        if initial_mod_time is not None:
+            try:
+                current_mod_time = os.stat(self.project_root / relative_path).st_mtime
+            except FileNotFoundError:
+                current_mod_time = None
+            if current_mod_time is None or current_mod_time > initial_mod_time:
+                self.changed_files.add(relative_path)
+                return True
+            return False
+
+        # Untracked paths may be new files, which requires a scan
         self._check_for_changes()
         return relative_path in self.changed_files
@@ -1,17 +1,304 @@
-import difflib
+import codecs
+import functools
 import os
+from collections.abc import Callable, Iterator
 from pathlib import Path
 from typing import TYPE_CHECKING
 
 import pathspec
-from rich.text import Text
+from rich.text import Span, Text
+
+try:
+    from diff_match_patch import diff_match_patch
+except ImportError:  # Optional "fast" extra; difflib is used for all inputs
+    diff_match_patch = None
+
+if TYPE_CHECKING:
+    # cdifflib's matcher is a drop-in for difflib's, so type against that
+    from difflib import SequenceMatcher
+else:
+    try:
+        from cdifflib import CSequenceMatcher as SequenceMatcher
+    except ImportError:  # Optional "fast" extra; pure-Python difflib instead
+        from difflib import SequenceMatcher
 
 from ..config import Config
+from ..models import ProjectSnapshot
 from .interfaces import FileServiceError, IFileService
 
 if TYPE_CHECKING:
     from ..config import Config
 
+# Files up to this size are read with a single raw os.read.
+SMALL_FILE_SIZE = 64 * 1024
+
+# Leading bytes of a larger file decoded before it is read in full, so
+# binary files are rejected without reading them.
+TEXT_SNIFF_SIZE = 8 * 1024
+
+# Combined content length above which diffs use diff-match-patch, if installed.
+LARGE_DIFF_THRESHOLD = 64_000
+
+# Number of context lines around each hunk, as in difflib.unified_diff.
+DIFF_CONTEXT_LINES = 3
+
+Opcode = tuple[str, int, int, int, int]
+
+
+@functools.lru_cache(maxsize=32)
+def _compile_gitignore(
+    gitignore_path: str, mtime_ns: int, size: int
+) -> pathspec.GitIgnoreSpec:
+    """Compile a .gitignore file into a GitIgnoreSpec.
+
+    `mtime_ns` and `size` are only part of the cache key, so an edited file
+    is recompiled while repeated loads of an unchanged one are free. The
+    size catches edits that land within the same mtime tick.
+    """
+    with open(gitignore_path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    return pathspec.GitIgnoreSpec.from_lines(lines)
+
+
+@functools.lru_cache(maxsize=8)
+def _filename_matcher(patterns: frozenset[str]) -> Callable[[str], bool]:
+    """Build a matcher for the wildcard ignore patterns.
+
+    `*.ext` suffixes and `name*` prefixes are grouped into tuples, so a
+    file name is checked with one `endswith` and one `startswith` call
+    instead of a loop over every pattern.
+    """
+    suffixes = tuple(p[1:] for p in patterns if p.startswith("*."))
+    prefixes = tuple(p[:-1] for p in patterns if p.endswith("*"))
+
+    def matches(filename: str) -> bool:
+        return (
+            filename.endswith(suffixes)
+            or filename.startswith(prefixes)
+            or filename in patterns
+        )
+
+    return matches
+
+
+def _one_sided_diff(
+    old_lines: list[str], new_lines: list[str], lineterm: str
+) -> list[str]:
+    """Build a unified diff where at least one side is empty.
+
+    Every line is simply added or removed, so the output of
+    `difflib.unified_diff` can be produced directly without matching.
+
+    Args:
+        old_lines: Lines of the original content
+        new_lines: Lines of the new content
+        lineterm: Terminator for the header lines, as in `difflib`
+
+    Returns:
+        Diff lines identical to those `difflib.unified_diff` would yield
+    """
+    lines, prefix = (old_lines, "-") if old_lines else (new_lines, "+")
+    if not lines:
+        return []
+    count = "1" if len(lines) == 1 else f"1,{len(lines)}"
+    hunk = f"@@ -0,0 +{count} @@" if prefix == "+" else f"@@ -{count} +0,0 @@"
+    return [
+        f"--- old{lineterm}",
+        f"+++ new{lineterm}",
+        f"{hunk}{lineterm}",
+        *(prefix + line for line in lines),
+    ]
+
+
+def _format_range(start: int, stop: int) -> str:
+    """Format a hunk line range the way `difflib.unified_diff` does."""
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return str(beginning)
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def _group_opcodes(opcodes: list[Opcode], n: int) -> Iterator[list[Opcode]]:
+    """Group opcodes into hunks with up to `n` lines of context.
+
+    Mirrors `difflib.SequenceMatcher.get_grouped_opcodes` for opcodes that
+    were computed by another matcher.
+    """
+    codes = list(opcodes) or [("equal", 0, 1, 0, 1)]
+    tag, i1, i2, j1, j2 = codes[0]
+    if tag == "equal":
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    tag, i1, i2, j1, j2 = codes[-1]
+    if tag == "equal":
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+    group: list[Opcode] = []
+    for tag, i1, i2, j1, j2 in codes:
+        # Split the group at large stretches of unchanged lines
+        if tag == "equal" and i2 - i1 > 2 * n:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+
+def _unified_diff(
+    old_lines: list[str],
+    new_lines: list[str],
+    opcodes: list[Opcode],
+    lineterm: str,
+) -> Iterator[str]:
+    """Format opcodes as unified diff lines, like `difflib.unified_diff`."""
+    started = False
+    for group in _group_opcodes(opcodes, DIFF_CONTEXT_LINES):
+        if not started:
+            started = True
+            yield f"--- old{lineterm}"
+            yield f"+++ new{lineterm}"
+        first, last = group[0], group[-1]
+        old_range = _format_range(first[1], last[2])
+        new_range = _format_range(first[3], last[4])
+        yield f"@@ -{old_range} +{new_range} @@{lineterm}"
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                for line in old_lines[i1:i2]:
+                    yield " " + line
+                continue
+            if tag in ("replace", "delete"):
+                for line in old_lines[i1:i2]:
+                    yield "-" + line
+            if tag in ("replace", "insert"):
+                for line in new_lines[j1:j2]:
+                    yield "+" + line
+
+
+def _line_ids(
+    old_lines: list[str], new_lines: list[str]
+) -> tuple[list[int], list[int]]:
+    """Map each distinct line to a small integer id.
+
+    Matching on ids instead of strings keeps the matcher's comparisons and
+    hashing cheap for long lines.
+    """
+    ids: dict[str, int] = {}
+    old_ids = [ids.setdefault(line, len(ids)) for line in old_lines]
+    new_ids = [ids.setdefault(line, len(ids)) for line in new_lines]
+    return old_ids, new_ids
+
+
+def _match_opcodes(old_lines: list[str], new_lines: list[str]) -> list[Opcode]:
+    """Compute line-level opcodes with difflib's matching algorithm.
+
+    Like git, identical leading and trailing lines are stripped first, so a
+    small edit in a large file only runs the matcher over the edited region.
+    Uses `cdifflib`'s C implementation when it is installed.
+    """
+    limit = min(len(old_lines), len(new_lines))
+    prefix = 0
+    while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+        suffix += 1
+
+    old_end = len(old_lines) - suffix
+    new_end = len(new_lines) - suffix
+    old_ids, new_ids = _line_ids(old_lines[prefix:old_end], new_lines[prefix:new_end])
+
+    opcodes: list[Opcode] = []
+    if prefix:
+        opcodes.append(("equal", 0, prefix, 0, prefix))
+    if old_ids or new_ids:
+        matcher = SequenceMatcher(None, old_ids, new_ids)
+        opcodes.extend(
+            (tag, i1 + prefix, i2 + prefix, j1 + prefix, j2 + prefix)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        )
+    if suffix:
+        opcodes.append(("equal", old_end, len(old_lines), new_end, len(new_lines)))
+    return opcodes
+
+
+def _dmp_opcodes(old_lines: list[str], new_lines: list[str]) -> list[Opcode] | None:
+    """Compute line-level opcodes with diff-match-patch.
+
+    Each distinct line is encoded as a single character so the diff runs in
+    diff-match-patch's line mode.
+
+    Returns:
+        Opcodes in `difflib` form, or None if the lines can't be encoded
+    """
+    line_ids: dict[str, int] = {}
+    try:
+        old_chars = "".join(
+            chr(line_ids.setdefault(line, len(line_ids))) for line in old_lines
+        )
+        new_chars = "".join(
+            chr(line_ids.setdefault(line, len(line_ids))) for line in new_lines
+        )
+    except ValueError:
+        # More distinct lines than there are code points
+        return None
+
+    opcodes: list[Opcode] = []
+    i = j = 0
+    for op, chars in diff_match_patch().diff_main(old_chars, new_chars, False):
+        count = len(chars)
+        if op == 0:
+            opcodes.append(("equal", i, i + count, j, j + count))
+            i += count
+            j += count
+        elif op == -1:
+            opcodes.append(("delete", i, i + count, j, j))
+            i += count
+        elif opcodes and opcodes[-1][0] == "delete" and opcodes[-1][2] == i:
+            # An insertion right after a deletion is a replacement
+            _, i1, i2, j1, _ = opcodes.pop()
+            opcodes.append(("replace", i1, i2, j1, j + count))
+            j += count
+        else:
+            opcodes.append(("insert", i, i, j, j + count))
+            j += count
+    return opcodes
+
+
+def _diff_lines(
+    old_lines: list[str], new_lines: list[str], lineterm: str
+) -> Iterator[str]:
+    """Yield unified diff lines for two already split inputs.
+
+    Both the plain and rich diffs are built on this, each splitting its
+    inputs once in the form it needs.
+
+    Args:
+        old_lines: Lines of the original content
+        new_lines: Lines of the new content
+        lineterm: Terminator for the header lines, as in `difflib`
+
+    Yields:
+        Unified diff lines
+    """
+    if not old_lines or not new_lines:
+        yield from _one_sided_diff(old_lines, new_lines, lineterm)
+        return
+
+    # difflib's matcher degrades badly on large inputs
+    opcodes = None
+    if (
+        diff_match_patch is not None
+        and sum(map(len, old_lines)) + sum(map(len, new_lines)) > LARGE_DIFF_THRESHOLD
+    ):
+        opcodes = _dmp_opcodes(old_lines, new_lines)
+    if opcodes is None:
+        opcodes = _match_opcodes(old_lines, new_lines)
+    yield from _unified_diff(old_lines, new_lines, opcodes, lineterm)
+
 
 class FileService(IFileService):
     """
@@ -34,6 +321,9 @@ class FileService(IFileService):
         self.ignore_patterns: set[str] = set(self.config.default_ignore_patterns)
         self.ignore_patterns.update(self.config.ignore_patterns)
         self.pathspec: pathspec.PathSpec | None = self._load_pathspec()
+        self._root_prefix: str = os.path.join(os.fspath(self._project_root), "")
+        # Relative directory -> whether .gitignore excludes it or an ancestor
+        self._dir_ignored_cache: dict[str, bool] = {}
 
     @property
     def project_root(self) -> Path:
@@ -46,13 +336,13 @@ class FileService(IFileService):
             return None
 
         gitignore_path = self.project_root / ".gitignore"
-        if not gitignore_path.exists():
+        try:
+            st = gitignore_path.stat()
+        except FileNotFoundError:
             return None
 
         try:
-            with open(gitignore_path, encoding="utf-8") as f:
-                lines = f.readlines()
-            return pathspec.PathSpec.from_lines("gitwildmatch", lines)
+            return _compile_gitignore(str(gitignore_path), st.st_mtime_ns, st.st_size)
         except Exception as e:
             raise FileServiceError(
                 f"Failed to load .gitignore for pathspec: {str(e)}",
@@ -69,34 +359,118 @@ class FileService(IFileService):
             True if the path should be ignored, False otherwise
         """
         # Check against default and custom patterns first
-        if any(part in self.ignore_patterns for part in path.parts):
+        if not self.ignore_patterns.isdisjoint(path.parts):
             return True
 
         # Check filename against wildcard patterns
-        filename = path.name
-        for pattern in self.ignore_patterns:
-            if (
-                pattern.startswith("*.")
-                and filename.endswith(pattern[1:])
-                or pattern.endswith("*")
-                and filename.startswith(pattern[:-1])
-                or pattern == filename
-            ):
-                return True
+        if self._matches_filename(path.name):
+            return True
 
         # Check against .gitignore patterns using pathspec
         if self.pathspec:
-            try:
-                # pathspec works with relative paths
-                relative_path = path.relative_to(self.project_root)
-                return self.pathspec.match_file(str(relative_path))
-            except ValueError:
-                # This can happen if the path is not within the project root,
-                # which shouldn't occur with the current file discovery logic.
+            # pathspec works with relative paths; paths outside the project
+            # root shouldn't occur with the current file discovery logic.
+            path_str = os.fspath(path)
+            if not path_str.startswith(self._root_prefix):
                 return False
+            relative_path = path_str[len(self._root_prefix) :]
+            if os.sep != "/":
+                relative_path = relative_path.replace(os.sep, "/")
+
+            parent, _, _ = relative_path.rpartition("/")
+            if parent and self._is_dir_ignored(parent):
+                return True
+            return self.pathspec.match_file(relative_path)
 
         return False
 
+    def _is_dir_ignored(self, relative_dir: str) -> bool:
+        """Check if .gitignore excludes a directory, caching per directory.
+
+        Ignored-ness is inherited, so a directory is ignored if it or any
+        ancestor matches.
+        """
+        cached = self._dir_ignored_cache.get(relative_dir)
+        if cached is None:
+            assert self.pathspec is not None
+            parent, _, _ = relative_dir.rpartition("/")
+            cached = bool(
+                parent and self._is_dir_ignored(parent)
+            ) or self.pathspec.match_file(relative_dir + "/")
+            self._dir_ignored_cache[relative_dir] = cached
+        return cached
+
+    def _matches_filename(self, filename: str) -> bool:
+        """Check a file name against the wildcard ignore patterns."""
+        return _filename_matcher(frozenset(self.ignore_patterns))(filename)
+
+    def _scan(self, scan_root: Path) -> Iterator[tuple[str, str]]:
+        """Yield non-ignored files under a root, pruning ignored directories.
+
+        Directories are checked as they are listed, so ignored subtrees such
+        as `.git` or `node_modules` are never entered. Gitignore patterns are
+        matched in one batch per directory.
+
+        Args:
+            scan_root: Directory to scan
+
+        Yields:
+            `(relative_path, absolute_path)` string pairs for files that pass
+            the ignore filters, with paths relative to `scan_root`
+        """
+        if not self.ignore_patterns.isdisjoint(scan_root.parts):
+            return
+
+        # pathspec matches paths relative to the project root
+        spec = self.pathspec
+        try:
+            relative_root = scan_root.relative_to(self.project_root).as_posix()
+            root_prefix = "" if relative_root == "." else relative_root + "/"
+        except ValueError:
+            spec = None
+            root_prefix = ""
+
+        # Patterns can't change mid-scan, so build the matcher once
+        matches_filename = _filename_matcher(frozenset(self.ignore_patterns))
+
+        # Relative paths are built with "/" for pathspec; yield native ones
+        root_len = len(root_prefix)
+        native_sep = None if os.sep == "/" else os.sep
+
+        stack = [(os.fspath(scan_root), root_prefix)]
+        while stack:
+            dir_path, prefix = stack.pop()
+            files: dict[str, str] = {}  # relative path -> absolute path
+            try:
+                entries = os.scandir(dir_path)
+            except OSError:
+                # Like os.walk, skip missing or unreadable directories
+                continue
+            with entries:
+                for entry in entries:
+                    name = entry.name
+                    if name in self.ignore_patterns:
+                        continue
+                    relative_path = prefix + name
+                    if entry.is_dir():
+                        # Like os.walk, don't follow symlinked directories
+                        if entry.is_symlink() or (
+                            spec and spec.match_file(relative_path + "/")
+                        ):
+                            continue
+                        stack.append((entry.path, relative_path + "/"))
+                    elif not matches_filename(name):
+                        files[relative_path] = entry.path
+
+            if spec and files:
+                for relative_path in spec.match_files(list(files)):
+                    del files[relative_path]
+            for relative_path, file_path in files.items():
+                relative_path = relative_path[root_len:]
+                if native_sep:
+                    relative_path = relative_path.replace("/", native_sep)
+                yield relative_path, file_path
+
     def get_project_files(self, root: Path | None = None) -> list[Path]:
         """Get all files under a root that aren't ignored.
 
@@ -111,27 +485,61 @@ class FileService(IFileService):
             FileServiceError: If file discovery fails
         """
         try:
-            files: list[Path] = []
+            return [Path(p) for _, p in self._scan(root or self.project_root)]
+        except Exception as e:
+            raise FileServiceError(
+                f"Failed to get project files: {str(e)}", service_name="FileService"
+            ) from e
 
-            scan_root = root or self.project_root
+    def iter_relative_project_files(self, root: Path | None = None) -> Iterator[str]:
+        """Yield paths of files under a root that aren't ignored, relative to it.
 
-            all_files = [
-                Path(root_path) / filename
-                for root_path, _, filenames in os.walk(scan_root)
-                for filename in filenames
-            ]
+        Unlike `get_project_files`, no `Path` objects are built, so callers
+        that only need relative names can stream them into a set.
 
-            # Filter ignored files
-            files = [
-                file_path for file_path in all_files if not self.is_ignored(file_path)
-            ]
+        Args:
+            root: Optional root directory to scan. Defaults to configured
+                `project_root`.
 
-            return files
+        Yields:
+            Paths relative to the scanned root, as strings
+
+        Raises:
+            FileServiceError: If file discovery fails
+        """
+        try:
+            for relative_path, _ in self._scan(root or self.project_root):
+                yield relative_path
         except Exception as e:
             raise FileServiceError(
                 f"Failed to get project files: {str(e)}", service_name="FileService"
             ) from e
 
+    def snapshot(self) -> ProjectSnapshot:
+        """Capture the project's files and modification times in one scan.
+
+        The result can be shared by callers that would otherwise each walk
+        the project, such as the file monitor and current-state comparison.
+
+        Returns:
+            Snapshot keyed by path relative to `project_root`
+
+        Raises:
+            FileServiceError: If file discovery fails
+        """
+        files: dict[str, Path] = {}
+        mtimes: dict[str, float] = {}
+        for file_path in self.get_project_files():
+            try:
+                mod_time = file_path.stat().st_mtime
+            except FileNotFoundError:
+                # Deleted between discovery and stat
+                continue
+            relative_path = str(file_path.relative_to(self.project_root))
+            files[relative_path] = file_path
+            mtimes[relative_path] = mod_time
+        return ProjectSnapshot(files=files, mtimes=mtimes)
+
     def read_file_content(self, file_path: Path) -> str | None:
         """Read file content, return None if it exceeds size limit or doesn't exist.
 
@@ -145,20 +553,30 @@ class FileService(IFileService):
             FileServiceError: If file reading fails unexpectedly
         """
         try:
-            # Check if file exists
-            if not file_path.exists():
-                return None
-
-            # Check file size before reading
-            file_size = file_path.stat().st_size
-            if file_size > self.config.max_file_size:
-                return None
-
-            with open(file_path, encoding="utf-8") as f:
-                content = f.read()
-                return content
+            fd = os.open(file_path, os.O_RDONLY)
+            try:
+                # Check file size on the open descriptor before reading
+                file_size = os.fstat(fd).st_size
+                if file_size > self.config.max_file_size:
+                    return None
+
+                if file_size > SMALL_FILE_SIZE:
+                    head = os.pread(fd, TEXT_SNIFF_SIZE, 0)
+                    codecs.getincrementaldecoder("utf-8")().decode(head)
+                    with open(fd, encoding="utf-8", closefd=False) as f:
+                        return f.read()
+
+                # Small files: one raw read, bypassing the buffered text layer
+                content = os.read(fd, file_size).decode("utf-8")
+            finally:
+                os.close(fd)
+
+            # Match text-mode universal newline translation
+            if "\r" in content:
+                content = content.replace("\r\n", "\n").replace("\r", "\n")
+            return content
         except (UnicodeDecodeError, OSError):
-            # Skip binary/unreadable files
+            # Skip missing/binary/unreadable files
             return None
         except Exception as e:
             raise FileServiceError(
@@ -178,13 +596,28 @@ class FileService(IFileService):
         Returns:
             Unified diff string showing changes between the two contents
         """
-        diff = difflib.unified_diff(
+        return "".join(FileService.iter_diff(old_content, new_content))
+
+    @staticmethod
+    def iter_diff(old_content: str, new_content: str) -> Iterator[str]:
+        """
+        Yield the lines of a unified diff between two content strings.
+
+        Lines are produced hunk by hunk, so callers that write them straight
+        to a file or console never hold the whole diff in memory.
+
+        Args:
+            old_content: The original content to compare
+            new_content: The new content to compare against
+
+        Yields:
+            Unified diff lines, each ending with its original line terminator
+        """
+        yield from _diff_lines(
             old_content.splitlines(keepends=True),
             new_content.splitlines(keepends=True),
-            fromfile="old",
-            tofile="new",
+            "\n",
         )
-        return "".join(diff)
 
     @staticmethod
     def generate_diff_rich(old_content: str, new_content: str) -> Text:
@@ -198,27 +631,37 @@ class FileService(IFileService):
         Returns:
             Rich Text object with color-coded diff lines
         """
-        diff_lines = difflib.unified_diff(
-            old_content.splitlines(),
-            new_content.splitlines(),
-            fromfile="old",
-            tofile="new",
-            lineterm="",
-        )
+        diff_lines = _diff_lines(old_content.splitlines(), new_content.splitlines(), "")
 
-        diff_text = Text()
+        # Collect plain lines and style spans, then build the Text once.
+        # Consecutive lines with the same style share a single span.
+        lines: list[str] = []
+        spans: list[Span] = []
+        offset = 0
         for line in diff_lines:
+            end = offset + len(line) + 1
             if line.startswith("+") and not line.startswith("+++"):
-                diff_text.append(line + "\n", style="green")
+                style = "green"
             elif line.startswith("-") and not line.startswith("---"):
-                diff_text.append(line + "\n", style="red")
+                style = "red"
             elif (
                 line.startswith("@@")
                 or line.startswith("---")
                 or line.startswith("+++")
             ):
-                diff_text.append(line + "\n", style="cyan")
+                style = "cyan"
             else:
-                diff_text.append(line + "\n")
-
-        return diff_text
+                style = None
+
+            if style is not None:
+                if spans and spans[-1].style == style and spans[-1].end == offset:
+                    spans[-1] = Span(spans[-1].start, end, style)
+                else:
+                    spans.append(Span(offset, end, style))
+            lines.append(line)
+            offset = end
+
+        if not lines:
+            return Text()
+        lines.append("")
+        return Text("\n".join(lines), spans=spans)
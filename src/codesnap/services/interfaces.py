@@ -5,10 +5,11 @@ should follow, ensuring consistent API and enabling dependency injection.
 """
 
 from abc import abstractmethod
+from collections.abc import Iterator
 from pathlib import Path
 from typing import Any, Protocol
 
-from ..models import Checkpoint, CodeChange, Prompt
+from ..models import Checkpoint, CodeChange, ProjectSnapshot, Prompt
 
 
 class IStorageManager(Protocol):
@@ -50,6 +51,16 @@ class IStorageManager(Protocol):
         """Load a file snapshot by its hash."""
         ...
 
+    @abstractmethod
+    def hash_file(self, file_path: Path) -> str:
+        """Hash a file's bytes with the algorithm used for snapshot hashes."""
+        ...
+
+    @abstractmethod
+    def snapshot_path(self, content_hash: str) -> Path:
+        """Get the path of the file holding a snapshot's content."""
+        ...
+
     @abstractmethod
     def export_data(
         self,
@@ -70,11 +81,26 @@ class IFileService(Protocol):
         """Get the project root directory."""
         ...
 
+    @abstractmethod
+    def is_ignored(self, path: Path) -> bool:
+        """Check if a path should be ignored."""
+        ...
+
     @abstractmethod
     def get_project_files(self, root: Path | None = None) -> list[Path]:
         """Get all files under a root that aren't ignored."""
         ...
 
+    @abstractmethod
+    def iter_relative_project_files(self, root: Path | None = None) -> Iterator[str]:
+        """Yield paths of non-ignored files relative to the scanned root."""
+        ...
+
+    @abstractmethod
+    def snapshot(self) -> ProjectSnapshot:
+        """Capture the project's files and modification times in one scan."""
+        ...
+
     @abstractmethod
     def read_file_content(self, file_path: Path) -> str | None:
         """Read file content, return None if it exceeds size limit or doesn't exist."""
@@ -85,6 +111,11 @@ class IFileService(Protocol):
         """Generate a unified diff between two content strings."""
         ...
 
+    @abstractmethod
+    def iter_diff(self, old_content: str, new_content: str) -> Iterator[str]:
+        """Yield the lines of a unified diff between two content strings."""
+        ...
+
     @abstractmethod
     def generate_diff_rich(self, old_content: str, new_content: str) -> Any:
         """Generate a rich Text diff between two content strings."""
@@ -129,14 +160,22 @@ class IComparisonService(Protocol):
 
     @abstractmethod
     def compare_checkpoints(
-        self, checkpoint1_id: int, checkpoint2_id: int, use_rich: bool = False
+        self,
+        checkpoint1_id: int,
+        checkpoint2_id: int,
+        use_rich: bool = False,
+        include_content: bool = False,
     ) -> list[CodeChange]:
         """Compare two checkpoints and return the differences."""
         ...
 
     @abstractmethod
     def compare_with_current(
-        self, checkpoint_id: int, use_rich: bool = False
+        self,
+        checkpoint_id: int,
+        use_rich: bool = False,
+        include_content: bool = False,
+        snapshot: ProjectSnapshot | None = None,
     ) -> list[CodeChange]:
         """Compare a checkpoint with the current project state."""
         ...
@@ -167,7 +206,7 @@ class IFileMonitorService(Protocol):
         ...
 
     @abstractmethod
-    def get_changed_files(self) -> set[str]:
+    def get_changed_files(self, snapshot: ProjectSnapshot | None = None) -> set[str]:
         """Get the current set of changed files."""
         ...
 
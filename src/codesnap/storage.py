@@ -1,10 +1,74 @@
+import contextlib
+import gzip
 import hashlib
-import json
+import os
+import re
+import secrets
+import stat
+import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, TextIO, TypeVar
 
+from pydantic import BaseModel
+
+from .config import MTIME_TRUST_MIN_AGE_NS
 from .models import Checkpoint, ExportFormat
 
+if TYPE_CHECKING:
+    from blake3 import blake3 as Blake3
+
+try:
+    from blake3 import blake3 as _blake3
+except ImportError:  # Optional "fast" extra; snapshots are keyed by SHA-256 instead
+    _blake3 = None  # type: ignore[assignment,misc]
+
+# BLAKE3 hasher class, or None without the "fast" extra
+blake3: type["Blake3"] | None = _blake3
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Checkpoint files loaded on a thread pool when there are more than this.
+PARALLEL_LOAD_THRESHOLD = 16
+LOAD_WORKERS = 8
+
+# Characters of text encoded per hash update.
+HASH_CHUNK_CHARS = 64 * 1024
+
+# Escapes HTML special characters in a single str.translate pass.
+HTML_ESCAPE_TABLE = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", "'": "&#39;", '"': "&quot;"}
+)
+
+# Colors exported diff lines by their first character; each substitution
+# runs over the whole escaped diff, so no Python code runs per line.
+DIFF_LINE_SUBS = [
+    (re.compile(r"^\+.*$", re.MULTILINE), r'<span style="color: green;">\g<0></span>'),
+    (re.compile(r"^-.*$", re.MULTILINE), r'<span style="color: red;">\g<0></span>'),
+    (re.compile(r"^@.*$", re.MULTILINE), r'<span style="color: cyan;">\g<0></span>'),
+]
+
+# Content size from which BLAKE3 hashes on several threads.
+PARALLEL_HASH_SIZE = 1024 * 1024
+
+# Bytes read per hash update when hashing a file on disk.
+HASH_READ_SIZE = 64 * 1024
+
+# Leading hash characters naming a snapshot's subdirectory of files_dir,
+# which keeps each directory small as snapshots accumulate.
+SHARD_CHARS = 2
+
+# File in files_dir marking a store whose snapshots are all sharded.
+SHARDED_LAYOUT_MARKER = ".sharded"
+
+# Names of snapshots stored directly in files_dir by the unsharded layout.
+FLAT_SNAPSHOT_NAME = re.compile(r"[0-9a-f]{64}")
+
+# Flags for a new temporary file; O_EXCL keeps it from ever being shared.
+TEMP_FILE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+
 
 class StorageManager:
     """Manages storage of prompts, checkpoints, and logs."""
@@ -28,83 +92,285 @@ class StorageManager:
         ]:
             directory.mkdir(exist_ok=True)
 
+        # A store from before sharding keeps its flat layout, readable by
+        # older builds, until the first snapshot save moves it over
+        self._layout_marker = self.files_dir / SHARDED_LAYOUT_MARKER
+        self._sharded = self._layout_marker.exists()
+        if not self._sharded and not any(self.files_dir.iterdir()):
+            self._layout_marker.touch()
+            self._sharded = True
+
+        # Parsed checkpoints by file name, valid while the directory's
+        # mtime matches the one recorded when they were loaded
+        self._checkpoint_cache: dict[str, Checkpoint] = {}
+        self._checkpoint_cache_mtime_ns: int | None = None
+        # Cached checkpoints ordered by timestamp, rebuilt when None
+        self._sorted_checkpoints: list[Checkpoint] | None = None
+        # Highest checkpoint id in the cache, computed when None
+        self._max_checkpoint_id: int | None = None
+
+        # Snapshot hashes present in files_dir, listed on first save
+        self._known_hashes: set[str] | None = None
+        # Shard directories known to exist in files_dir
+        self._shards: set[str] = set()
+
     @property
     def checkpoints_dir(self) -> Path:
         """Get the checkpoints directory."""
         return self._checkpoints_dir
 
-    def _get_file_hash(self, content: str) -> str:
-        """Generate a hash for file content."""
-        return hashlib.sha256(content.encode()).hexdigest()
-
-    def _save_json(self, path: Path, data: dict[str, Any]) -> None:
-        """Save data as JSON to a file."""
-        with open(path, "w") as f:
-            json.dump(data, f, indent=2, default=str)
-
-    def _load_json(self, path: Path) -> dict[str, Any]:
-        """Load JSON data from a file."""
-        if not path.exists():
-            return {}
-        with open(path) as f:
-            return json.load(f)
+    def _get_file_hash(self, content: str | bytes) -> str:
+        """Generate a hash for file content.
+
+        The hash is only a local content address, so the faster BLAKE3 is
+        used when installed and SHA-256 otherwise; both give 64 hex digits.
+        Text is encoded in windows, so hashing never holds a full UTF-8 copy
+        of a large file.
+        """
+        hasher = self._new_hasher(len(content))
+        if isinstance(content, bytes):
+            hasher.update(content)
+            return hasher.hexdigest()
+
+        for start in range(0, len(content), HASH_CHUNK_CHARS):
+            hasher.update(content[start : start + HASH_CHUNK_CHARS].encode())
+        return hasher.hexdigest()
+
+    @staticmethod
+    def _new_hasher(size: int) -> Any:
+        if blake3 is None:
+            return hashlib.sha256()
+        if size >= PARALLEL_HASH_SIZE:
+            return blake3(max_threads=blake3.AUTO)
+        return blake3()
+
+    def hash_file(self, file_path: Path) -> str:
+        """Hash a file's bytes the way its snapshot would be addressed.
+
+        The result equals the hash `save_file_snapshot` returns for the
+        file's text when that text is stored unchanged, so a match means the
+        file still holds the snapshot's content.
+        """
+        with open(file_path, "rb") as f:
+            hasher = self._new_hasher(os.fstat(f.fileno()).st_size)
+            while chunk := f.read(HASH_READ_SIZE):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def _save_model(self, path: Path, model: BaseModel) -> None:
+        """Save a model as JSON, serialized directly by pydantic."""
+        encoded = model.model_dump_json(indent=2, fallback=str).encode()
+        self._write_atomic(path, (encoded,))
+
+    def _write_atomic(self, path: Path, chunks: Iterable[bytes]) -> None:
+        """Write a file through a temporary file renamed into place.
+
+        Readers never see a partly written file, and a failed write leaves
+        any previous version intact.
+        """
+        # Unlike mkstemp's owner-only 0600, creating the file with 0o666 lets
+        # the kernel apply the current umask, as a plain open() would
+        while True:
+            temp_path = path.parent / f".tmp-{secrets.token_hex(8)}"
+            try:
+                fd = os.open(temp_path, TEMP_FILE_FLAGS, 0o666)
+                break
+            except FileExistsError:
+                continue
+        try:
+            with contextlib.suppress(FileNotFoundError):
+                # An overwritten file keeps its permissions
+                os.fchmod(fd, stat.S_IMODE(os.stat(path).st_mode))
+            with open(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(temp_path, path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(temp_path)
+            raise
+
+    def _load_model(self, path: str | Path, model_type: type[ModelT]) -> ModelT:
+        """Load a model from a JSON file, parsed directly by pydantic."""
+        with open(path, "rb") as f:
+            return model_type.model_validate_json(f.read())
 
     # Checkpoint operations
     def save_checkpoint(self, checkpoint: Checkpoint) -> None:
         """Save a checkpoint to storage."""
         checkpoint_path = self._checkpoints_dir / f"{checkpoint.id}.json"
-        self._save_json(checkpoint_path, checkpoint.model_dump())
+        self._save_model(checkpoint_path, checkpoint)
+
+        # The write leaves the directory's mtime too recent to trust, so the
+        # next listing reads the checkpoint files again
+        self._checkpoint_cache_mtime_ns = None
 
     def load_checkpoint(self, checkpoint_id: int) -> Checkpoint | None:
-        """Load a checkpoint from storage."""
+        """Load a checkpoint from storage.
+
+        Checkpoints are served from the listing cache while it is current.
+        Checkpoint models are frozen, so callers share the cached instances.
+        """
         checkpoint_path = self._checkpoints_dir / f"{checkpoint_id}.json"
-        if not checkpoint_path.exists():
+        if self._checkpoint_cache_is_current():
+            return self._checkpoint_cache.get(checkpoint_path.name)
+        try:
+            return self._load_model(checkpoint_path, Checkpoint)
+        except FileNotFoundError:
             return None
 
-        data = self._load_json(checkpoint_path)
-        return Checkpoint(**data)
-
     def list_checkpoints(self) -> list[Checkpoint]:
-        """List all checkpoints."""
-        checkpoints = []
-        for checkpoint_file in self._checkpoints_dir.glob("*.json"):
-            data = self._load_json(checkpoint_file)
-            checkpoint = Checkpoint(**data)
-            checkpoints.append(checkpoint)
-        return sorted(checkpoints, key=lambda c: c.timestamp)
+        """List all checkpoints.
+
+        Checkpoint files are only re-read when the checkpoints directory has
+        changed since the last listing.
+        """
+        if not self._checkpoint_cache_is_current():
+            mtime_ns = self._checkpoints_dir.stat().st_mtime_ns
+            entries = self._scan_checkpoint_files()
+            paths = [entry.path for entry in entries]
+            if len(paths) > PARALLEL_LOAD_THRESHOLD:
+                # Overlap file reads, which release the GIL, with parsing
+                with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as executor:
+                    checkpoints = list(
+                        executor.map(self._load_model, paths, repeat(Checkpoint))
+                    )
+            else:
+                checkpoints = [self._load_model(p, Checkpoint) for p in paths]
+            cache = {
+                entry.name: checkpoint
+                for entry, checkpoint in zip(entries, checkpoints, strict=True)
+            }
+            self._checkpoint_cache = cache
+            self._sorted_checkpoints = None
+            self._max_checkpoint_id = None
+            # Another write within the same mtime tick would go unnoticed, so
+            # only a directory that has been quiet for a while is trusted
+            if mtime_ns < time.time_ns() - MTIME_TRUST_MIN_AGE_NS:
+                self._checkpoint_cache_mtime_ns = mtime_ns
+            else:
+                self._checkpoint_cache_mtime_ns = None
+        if self._sorted_checkpoints is None:
+            self._sorted_checkpoints = sorted(
+                self._checkpoint_cache.values(), key=lambda c: c.timestamp
+            )
+        return list(self._sorted_checkpoints)
+
+    def _checkpoint_cache_is_current(self) -> bool:
+        """Check whether cached checkpoints match the checkpoints directory."""
+        return (
+            self._checkpoint_cache_mtime_ns is not None
+            and self._checkpoint_cache_mtime_ns
+            == self._checkpoints_dir.stat().st_mtime_ns
+        )
 
     def get_next_checkpoint_id(self) -> int:
         """Get the next available checkpoint ID."""
-        existing_ids = []
-        for checkpoint_file in self._checkpoints_dir.glob("*.json"):
-            try:
-                checkpoint_id = int(checkpoint_file.stem)
-                existing_ids.append(checkpoint_id)
-            except ValueError:
-                continue
-
-        return max(existing_ids) + 1 if existing_ids else 1
+        if self._checkpoint_cache_is_current():
+            # Cached file names are current, so the directory needn't be read
+            if self._max_checkpoint_id is None:
+                self._max_checkpoint_id = self._max_id(self._checkpoint_cache)
+            return self._max_checkpoint_id + 1
+
+        return self._max_id(entry.name for entry in self._scan_checkpoint_files()) + 1
+
+    @staticmethod
+    def _max_id(names: Iterable[str]) -> int:
+        """Get the highest id among checkpoint file names, or 0 if none."""
+        # A digit check is cheaper than catching int()'s ValueError
+        stems = (name.removesuffix(".json") for name in names)
+        return max((int(stem) for stem in stems if stem.isdecimal()), default=0)
+
+    def _scan_checkpoint_files(self) -> list[os.DirEntry[str]]:
+        """List the checkpoint JSON files without building a Path for each."""
+        with os.scandir(self._checkpoints_dir) as entries:
+            return [
+                entry
+                for entry in entries
+                if entry.name.endswith(".json") and entry.is_file()
+            ]
 
     # File snapshot operations
     def save_file_snapshot(self, content: str) -> str:
         """Save a file snapshot and return its content hash."""
-        content_hash = self._get_file_hash(content)
-        snapshot_path = self.files_dir / content_hash
+        # Most files fit in one hashing window, so encode them once for
+        # both the hash and the write
+        encoded = content.encode() if len(content) <= HASH_CHUNK_CHARS else None
+        content_hash = self._get_file_hash(content if encoded is None else encoded)
+        if not self._sharded:
+            self._shard_flat_snapshots()
+        if self._known_hashes is None:
+            # One listing per shard replaces an exists() check per snapshot
+            self._known_hashes = set()
+            with os.scandir(self.files_dir) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        self._shards.add(entry.name)
+                        self._known_hashes.update(
+                            entry.name + name for name in os.listdir(entry.path)
+                        )
 
-        if not snapshot_path.exists():
-            with open(snapshot_path, "w", encoding="utf-8") as f:
-                f.write(content)
+        if content_hash not in self._known_hashes:
+            shard = content_hash[:SHARD_CHARS]
+            if shard not in self._shards:
+                (self.files_dir / shard).mkdir(exist_ok=True)
+                self._shards.add(shard)
+
+            if encoded is not None:
+                chunks: Iterable[bytes] = (encoded,)
+            else:
+                chunks = (
+                    content[start : start + HASH_CHUNK_CHARS].encode()
+                    for start in range(0, len(content), HASH_CHUNK_CHARS)
+                )
+            # Concurrent writers of the same hash replace it with
+            # identical content
+            self._write_atomic(self.snapshot_path(content_hash), chunks)
+            self._known_hashes.add(content_hash)
 
         return content_hash
 
+    def snapshot_path(self, content_hash: str) -> Path:
+        """Get the path of the file holding a snapshot's content."""
+        if not self._sharded:
+            return self.files_dir / content_hash
+        return self.files_dir / content_hash[:SHARD_CHARS] / content_hash[SHARD_CHARS:]
+
+    def _shard_flat_snapshots(self) -> None:
+        """Move snapshots stored directly in files_dir into their shards.
+
+        Only names that look like snapshot hashes are moved. The layout
+        marker is written last, so an interrupted move resumes next time.
+        """
+        with os.scandir(self.files_dir) as entries:
+            flat = [
+                entry.name
+                for entry in entries
+                if FLAT_SNAPSHOT_NAME.fullmatch(entry.name) and entry.is_file()
+            ]
+        self._sharded = True
+        for content_hash in flat:
+            (self.files_dir / content_hash[:SHARD_CHARS]).mkdir(exist_ok=True)
+            # Another process may be moving the same snapshot
+            with contextlib.suppress(FileNotFoundError):
+                os.replace(
+                    self.files_dir / content_hash, self.snapshot_path(content_hash)
+                )
+        self._layout_marker.touch()
+
     def load_file_snapshot(self, content_hash: str) -> str | None:
         """Load a file snapshot by its hash."""
-        snapshot_path = self.files_dir / content_hash
-        if not snapshot_path.exists():
+        try:
+            # Raw bytes skip the buffered text layer
+            data = self.snapshot_path(content_hash).read_bytes()
+        except FileNotFoundError:
             return None
+        content = data.decode("utf-8")
 
-        with open(snapshot_path) as f:
-            return f.read()
+        # Match text-mode universal newline translation
+        if "\r" in content:
+            content = content.replace("\r\n", "\n").replace("\r", "\n")
+        return content
 
     # Export operations
     def export_data(
@@ -129,6 +395,15 @@ class StorageManager:
         else:
             raise ValueError(f"Unsupported export format: {fmt}")
 
+    @staticmethod
+    def _open_export(output_path: Path) -> TextIO:
+        """Open an export file for writing, gzip-compressed if it ends in .gz."""
+        if output_path.suffix == ".gz":
+            # Export text is repetitive, so the fastest level already
+            # compresses it well
+            return gzip.open(output_path, "wt", encoding="utf-8", compresslevel=1)
+        return open(output_path, "w", encoding="utf-8")
+
     def _export_markdown(
         self,
         output_path: Path,
@@ -136,27 +411,35 @@ class StorageManager:
     ) -> None:
         """Export data as Markdown, showing diffs between checkpoints chronologically."""  # noqa: E501
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write("# CodeSnap Export\n\n")
-            f.write("## Table of Contents\n\n")
+        with self._open_export(output_path) as f:
+            # Collect output and write it to the file once per checkpoint
+            parts: list[str] = []
+            write = parts.append
+
+            write("# CodeSnap Export\n\n")
+            write("## Table of Contents\n\n")
 
             checkpoints = self.list_checkpoints()
 
+            # Display names and anchor slugs, shared by the TOC and sections
+            names = {c.id: c.name for c in checkpoints}
+            slugs = {id_: name.lower().replace(" ", "-") for id_, name in names.items()}
+
             # Generate table of contents
             for i, checkpoint in enumerate(checkpoints, 1):
                 if checkpoint.restored_from:
-                    f.write(
-                        f"{i}. [Restore: {checkpoint.name}](#restore-{checkpoint.name.lower().replace(' ', '-')})\n"  # noqa: E501
+                    write(
+                        f"{i}. [Restore: {names[checkpoint.id]}](#restore-{slugs[checkpoint.id]})\n"  # noqa: E501
                     )
                 elif checkpoint.prompt:
-                    f.write(
+                    write(
                         f"{i}. [Checkpoint {checkpoint.id}](#checkpoint-{checkpoint.id})\n"  # noqa: E501
                     )
                 else:
-                    f.write(
-                        f"{i}. [Initial: {checkpoint.name}](#initial-{checkpoint.name.lower().replace(' ', '-')})\n"  # noqa: E501
+                    write(
+                        f"{i}. [Initial: {names[checkpoint.id]}](#initial-{slugs[checkpoint.id]})\n"  # noqa: E501
                     )
-            f.write("\n---\n\n")
+            write("\n---\n\n")
 
             # Process checkpoints
             prev_checkpoint_id = None
@@ -164,14 +447,14 @@ class StorageManager:
                 # Write prompt if it exists
                 if checkpoint.prompt:
                     prompt = checkpoint.prompt
-                    f.write(
+                    write(
                         f"## Checkpoint {checkpoint.id} {{#checkpoint-{checkpoint.id}}}\n\n"  # noqa: E501
                     )
                     if prompt.content:
-                        f.write(f"**Prompt:**\n```\n{prompt.content}\n```\n")
+                        write(f"**Prompt:**\n```\n{prompt.content}\n```\n")
 
                     if prompt.tags:
-                        f.write(f"**Tags:** {', '.join(prompt.tags)}\n\n")
+                        write(f"**Tags:** {', '.join(prompt.tags)}\n\n")
 
                     # If there was a previous checkpoint, show diff
                     if (
@@ -179,51 +462,56 @@ class StorageManager:
                         and checkpoint_system
                         and not checkpoint.restored_from
                     ):
-                        f.write("### Changes from previous checkpoint\n\n")
+                        write("### Changes from previous checkpoint\n\n")
                         changes = checkpoint_system.compare_checkpoints(
                             prev_checkpoint_id, checkpoint.id
                         )
                         if changes:
                             for change in changes:
-                                f.write(
+                                write(
                                     f"**File:** `{change.file_path}` "
                                     f"({change.change_type})\n\n"
                                 )
                                 if change.diff:
-                                    f.write(f"```diff\n{change.diff}\n```\n\n")
+                                    write(f"```diff\n{change.diff}\n```\n\n")
                         else:
-                            f.write("No changes detected.\n\n")
+                            write("No changes detected.\n\n")
 
                 # Write checkpoint info
                 # Handle restore checkpoints
                 if checkpoint.restored_from:
-                    f.write(
-                        f"## Restore Operation: {checkpoint.name} {{#restore-{checkpoint.name.lower().replace(' ', '-')}}}\n\n"  # noqa: E501
+                    write(
+                        f"## Restore Operation: {names[checkpoint.id]} {{#restore-{slugs[checkpoint.id]}}}\n\n"  # noqa: E501
                     )
 
-                    f.write(f"**Description:** {checkpoint.description}\n\n")
-                    f.write(f"**Restored from:** {checkpoint.restored_from}\n\n")
+                    write(f"**Description:** {checkpoint.description}\n\n")
+                    write(f"**Restored from:** {checkpoint.restored_from}\n\n")
                     if checkpoint.restore_timestamp:
-                        f.write(
+                        write(
                             f"**Restore timestamp:** {checkpoint.restore_timestamp}\n\n"
                         )
                     if checkpoint.tags:
-                        f.write(f"**Tags:** {', '.join(checkpoint.tags)}\n\n")
-                    f.write("---\n\n")
+                        write(f"**Tags:** {', '.join(checkpoint.tags)}\n\n")
+                    write("---\n\n")
                 elif not checkpoint.prompt:
                     # Initial checkpoint
-                    f.write(
-                        f"## Initial Checkpoint: {checkpoint.name} {{#initial-{checkpoint.name.lower().replace(' ', '-')}}}\n\n"  # noqa: E501
+                    write(
+                        f"## Initial Checkpoint: {names[checkpoint.id]} {{#initial-{slugs[checkpoint.id]}}}\n\n"  # noqa: E501
                     )
 
-                    f.write(f"**Description:** {checkpoint.description}\n\n")
+                    write(f"**Description:** {checkpoint.description}\n\n")
                     if checkpoint.tags:
-                        f.write(f"**Tags:** {', '.join(checkpoint.tags)}\n\n")
+                        write(f"**Tags:** {', '.join(checkpoint.tags)}\n\n")
 
                 # Only update previous checkpoint if this is not a restore checkpoint
                 if not checkpoint.restored_from:
                     prev_checkpoint_id = checkpoint.id
 
+                f.write("".join(parts))
+                parts.clear()
+
+            f.write("".join(parts))
+
     def _export_html(
         self,
         output_path: Path,
@@ -232,38 +520,22 @@ class StorageManager:
         """Export data as HTML, showing diffs between checkpoints chronologically."""  # noqa: E501
 
         def escape_html(text: str) -> str:
-            return (
-                text.replace("&", "&amp;")
-                .replace("<", "&lt;")
-                .replace(">", "&gt;")
-                .replace("'", "&#39;")
-                .replace('"', "&quot;")
-            )
+            return text.translate(HTML_ESCAPE_TABLE)
 
         def diff_to_html(diff: str) -> str:
-            lines = diff.split("\n")
-            html_lines = []
-            for line in lines:
-                line_escaped = escape_html(line)
-                if line.startswith("+"):
-                    html_lines.append(
-                        f'<span style="color: green;">{line_escaped}</span>'
-                    )
-                elif line.startswith("-"):
-                    html_lines.append(
-                        f'<span style="color: red;">{line_escaped}</span>'
-                    )
-                elif line.startswith("@"):
-                    html_lines.append(
-                        f'<span style="color: cyan;">{line_escaped}</span>'
-                    )
-                else:
-                    html_lines.append(line_escaped)
-            return "\n".join(html_lines)
-
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write("<!DOCTYPE html><html><head><title>CodeSnap Export</title>")
-            f.write(
+            # Escaping never changes a leading +, - or @, so it can run first
+            html = escape_html(diff)
+            for pattern, template in DIFF_LINE_SUBS:
+                html = pattern.sub(template, html)
+            return html
+
+        with self._open_export(output_path) as f:
+            # Collect output and write it to the file once per checkpoint
+            parts: list[str] = []
+            write = parts.append
+
+            write("<!DOCTYPE html><html><head><title>CodeSnap Export</title>")
+            write(
                 """<style>
                 body { font-family: sans-serif; line-height: 1.6; margin: 2em; }
                 h1, h2, h3, h4 { color: #333; }
@@ -283,34 +555,39 @@ class StorageManager:
                 .diff-section { margin-left: 1em; }
             </style>"""
             )
-            f.write("</head><body>")
-            f.write("<h1>CodeSnap Export</h1>")
-            f.write("<h2>Table of Contents</h2>")
+            write("</head><body>")
+            write("<h1>CodeSnap Export</h1>")
+            write("<h2>Table of Contents</h2>")
 
             checkpoints = self.list_checkpoints()
 
+            # Escaped names and anchor slugs, shared by the TOC and sections
+            names = {c.id: c.name for c in checkpoints}
+            slugs = {id_: name.lower().replace(" ", "-") for id_, name in names.items()}
+            names = {id_: escape_html(name) for id_, name in names.items()}
+
             # Generate table of contents
-            f.write("<ol>")
+            write("<ol>")
             for checkpoint in checkpoints:
                 if checkpoint.restored_from:
-                    f.write(
+                    write(
                         f'<li><a href="#restore-'
-                        f'{checkpoint.name.lower().replace(" ", "-")}">'
-                        f"Restore: {escape_html(checkpoint.name)}</a></li>"
+                        f'{slugs[checkpoint.id]}">'
+                        f"Restore: {names[checkpoint.id]}</a></li>"
                     )
                 elif checkpoint.prompt:
-                    f.write(
+                    write(
                         f'<li><a href="#checkpoint-{checkpoint.id}">'
                         f"Checkpoint {checkpoint.id}</a></li>"
                     )
                 else:
-                    f.write(
+                    write(
                         f'<li><a href="#initial-'
-                        f'{checkpoint.name.lower().replace(" ", "-")}">'
-                        f"Initial: {escape_html(checkpoint.name)}</a></li>"
+                        f'{slugs[checkpoint.id]}">'
+                        f"Initial: {names[checkpoint.id]}</a></li>"
                     )
-            f.write("</ol>")
-            f.write("<hr>")
+            write("</ol>")
+            write("<hr>")
 
             # Process checkpoints
             prev_checkpoint_id = None
@@ -318,18 +595,16 @@ class StorageManager:
                 # Write prompt if it exists
                 if checkpoint.prompt:
                     prompt = checkpoint.prompt
-                    f.write(
+                    write(
                         f'<h2 id="checkpoint-{checkpoint.id}">'
                         f"Checkpoint {checkpoint.id}</h2>"
                     )
                     if prompt.content:
-                        f.write("<p><strong>Prompt:</strong></p>")
-                        f.write(
-                            f"<pre><code>{escape_html(prompt.content)}</code></pre>"
-                        )
+                        write("<p><strong>Prompt:</strong></p>")
+                        write(f"<pre><code>{escape_html(prompt.content)}</code></pre>")
 
                     if prompt.tags:
-                        f.write(
+                        write(
                             f"<p><strong>Tags:</strong> "
                             f"{escape_html(', '.join(prompt.tags))}</p>"
                         )
@@ -340,62 +615,62 @@ class StorageManager:
                         and checkpoint_system
                         and not checkpoint.restored_from
                     ):
-                        f.write("<h3>Changes from previous checkpoint</h3>")
+                        write("<h3>Changes from previous checkpoint</h3>")
                         changes = checkpoint_system.compare_checkpoints(
                             prev_checkpoint_id, checkpoint.id
                         )
                         if changes:
                             for change in changes:
-                                f.write(
+                                write(
                                     f"<p><strong>File:</strong> "
                                     f"<code>{escape_html(change.file_path)}</code>"
                                     f" ({change.change_type})</p>"
                                 )
                                 if change.diff:
-                                    f.write(f"<pre>{diff_to_html(change.diff)}</pre>")
+                                    write(f"<pre>{diff_to_html(change.diff)}</pre>")
                         else:
-                            f.write("<p>No changes detected.</p>")
+                            write("<p>No changes detected.</p>")
 
                 # Write checkpoint info
                 # Handle restore checkpoints
                 if checkpoint.restored_from:
-                    f.write(
-                        f'<h2 id="restore-{checkpoint.name.lower().replace(" ", "-")}">'
-                        f"Restore Operation: {escape_html(checkpoint.name)}</h2>"
+                    write(
+                        f'<h2 id="restore-{slugs[checkpoint.id]}">'
+                        f"Restore Operation: {names[checkpoint.id]}</h2>"
                     )
 
-                    f.write(
+                    write(
                         f"<p><strong>Description:</strong> "
                         f"{escape_html(checkpoint.description)}</p>"
                     )
-                    f.write(
+                    write(
                         f"<p><strong>Restored from:</strong> "
                         f"{checkpoint.restored_from}</p>"
                     )
                     if checkpoint.restore_timestamp:
-                        f.write(
+                        write(
                             f"<p><strong>Restore timestamp:</strong> "
                             f"{checkpoint.restore_timestamp}</p>"
                         )
                     if checkpoint.tags:
-                        f.write(
+                        write(
                             f"<p><strong>Tags:</strong> "
                             f"{escape_html(', '.join(checkpoint.tags))}</p>"
                         )
-                    f.write("<hr>")
+                    write("<hr>")
                 elif not checkpoint.prompt:
                     # Initial checkpoint
-                    f.write(
-                        f'<h2 id="initial-{checkpoint.name.lower().replace(" ", "-")}">'
-                        f"Initial Checkpoint: {escape_html(checkpoint.name)}</h2>"
+                    write(
+                        f'<h2 id="initial-{slugs[checkpoint.id]}">'
+                        f"Initial Checkpoint: {names[checkpoint.id]}</h2>"
                     )
 
-                    f.write(
+                    write(
                         f"<p><strong>Description:</strong> "
                         f"{escape_html(checkpoint.description)}</p>"
                     )
                     if checkpoint.tags:
-                        f.write(
+                        write(
                             f"<p><strong>Tags:</strong> "
                             f"{escape_html(', '.join(checkpoint.tags))}</p>"
                         )
@@ -404,4 +679,8 @@ class StorageManager:
                 if not checkpoint.restored_from:
                     prev_checkpoint_id = checkpoint.id
 
-            f.write("</body></html>")
+                f.write("".join(parts))
+                parts.clear()
+
+            write("</body></html>")
+            f.write("".join(parts))
@@ -1,12 +1,11 @@
-import shutil
-import tempfile
+import os
 from pathlib import Path
 from unittest.mock import Mock
 
 import pytest
 
 from codesnap.models import Prompt
-from codesnap.services.checkpoint_service import CheckpointService
+from codesnap.services.checkpoint_service import SNAPSHOT_BATCH_SIZE, CheckpointService
 from codesnap.services.interfaces import CheckpointError, IFileService, IStorageManager
 
 
@@ -15,7 +14,6 @@ class TestCheckpointService:
 
     def setup_method(self):
         """Set up test environment before each test."""
-        self.temp_dir = Path(tempfile.mkdtemp())
         self.mock_storage = Mock(spec=IStorageManager)
         self.mock_file_service = Mock(spec=IFileService)
         self.checkpoint_service = CheckpointService(
@@ -24,11 +22,6 @@ class TestCheckpointService:
         self.project_root = Path("/mock/project")
         self.mock_file_service.project_root = self.project_root
 
-    def teardown_method(self):
-        """Clean up test environment after each test."""
-        if self.temp_dir.exists():
-            shutil.rmtree(self.temp_dir)
-
     def test_checkpoint_service_initialization(self):
         """Test CheckpointService initialization."""
         assert self.checkpoint_service._storage == self.mock_storage
@@ -325,3 +318,52 @@ class TestCheckpointService:
         assert checkpoint.tags == tags
         assert checkpoint.prompt == prompt
         assert checkpoint.file_snapshots == {"file1.py": "hash1"}
+
+    def test_create_checkpoint_with_several_batches(self):
+        """Test that snapshots taken across batches keep file order."""
+        self.mock_storage.get_next_checkpoint_id.return_value = 1
+        file_names = [f"file{i}.py" for i in range(SNAPSHOT_BATCH_SIZE * 2 + 1)]
+        self.mock_file_service.get_project_files.return_value = [
+            self.project_root / name for name in file_names
+        ]
+        self.mock_file_service.read_file_content.side_effect = lambda path: (
+            None if path.name == "file0.py" else path.name
+        )
+        self.mock_storage.save_file_snapshot.side_effect = lambda content: (
+            f"hash-{content}"
+        )
+
+        checkpoint = self.checkpoint_service.create_checkpoint()
+
+        assert list(checkpoint.file_snapshots.items()) == [
+            (name, f"hash-{name}") for name in file_names[1:]
+        ]
+
+    def test_create_checkpoint_reuses_hashes_of_unchanged_files(self, tmp_path):
+        """Test that files unchanged since the last checkpoint aren't re-read."""
+        self.mock_file_service.project_root = tmp_path
+        self.mock_storage.get_next_checkpoint_id.return_value = 1
+        old_file = tmp_path / "old.py"
+        new_file = tmp_path / "new.py"
+        old_file.write_text("old")
+        new_file.write_text("new")
+        os.utime(old_file, (0, 0))
+        self.mock_file_service.get_project_files.return_value = [old_file, new_file]
+        self.mock_file_service.read_file_content.side_effect = Path.read_text
+        self.mock_storage.save_file_snapshot.side_effect = lambda content: (
+            f"hash-{content}"
+        )
+
+        self.checkpoint_service.create_checkpoint()
+        old_file.write_text("changed")
+        os.utime(old_file, (1, 1))
+        checkpoint = self.checkpoint_service.create_checkpoint()
+        third = self.checkpoint_service.create_checkpoint()
+
+        assert checkpoint.file_snapshots == {
+            "old.py": "hash-changed",
+            "new.py": "hash-new",
+        }
+        assert third.file_snapshots == checkpoint.file_snapshots
+        # Recently modified new.py is read every time, old.py only on changes
+        assert self.mock_file_service.read_file_content.call_count == 5
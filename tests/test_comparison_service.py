@@ -1,3 +1,4 @@
+import os
 import shutil
 import tempfile
 from pathlib import Path
@@ -5,8 +6,11 @@ from unittest.mock import Mock
 
 import pytest
 
-from codesnap.models import Checkpoint
-from codesnap.services.comparison_service import ComparisonService
+from codesnap.models import Checkpoint, ProjectSnapshot
+from codesnap.services.comparison_service import (
+    LOAD_BATCH_SIZE,
+    ComparisonService,
+)
 from codesnap.services.interfaces import ComparisonError, IFileService, IStorageManager
 
 
@@ -64,7 +68,9 @@ class TestComparisonService:
         self.mock_storage.load_file_snapshot.side_effect = mock_load_file_snapshot
 
         # Compare checkpoints
-        changes = self.comparison_service.compare_checkpoints(1, 2)
+        changes = self.comparison_service.compare_checkpoints(
+            1, 2, include_content=True
+        )
 
         # Verify changes
         assert len(changes) == 2
@@ -136,7 +142,9 @@ class TestComparisonService:
         self.mock_storage.load_file_snapshot.side_effect = mock_load_file_snapshot
 
         # Compare checkpoints
-        changes = self.comparison_service.compare_checkpoints(1, 2)
+        changes = self.comparison_service.compare_checkpoints(
+            1, 2, include_content=True
+        )
 
         # Verify changes
         assert len(changes) == 1
@@ -170,6 +178,45 @@ class TestComparisonService:
         # Verify no changes
         assert len(changes) == 0
 
+    def test_compare_checkpoints_skips_identical_hashes(self):
+        """Test that files with unchanged hashes are never loaded."""
+        checkpoint1 = Checkpoint(
+            id=1, file_snapshots={"same.py": "hash1", "changed.py": "hash2"}
+        )
+        checkpoint2 = Checkpoint(
+            id=2, file_snapshots={"same.py": "hash1", "changed.py": "hash3"}
+        )
+
+        self.mock_storage.load_checkpoint.side_effect = [checkpoint1, checkpoint2]
+        self.mock_storage.load_file_snapshot.side_effect = lambda h: h
+
+        changes = self.comparison_service.compare_checkpoints(1, 2)
+
+        assert [c.file_path for c in changes] == ["changed.py"]
+        loaded = [
+            c.args[0] for c in self.mock_storage.load_file_snapshot.call_args_list
+        ]
+        assert sorted(loaded) == ["hash2", "hash3"]
+
+    def test_compare_checkpoints_loads_shared_hashes_once(self):
+        """Test that a snapshot shared by several files is loaded once."""
+        checkpoint1 = Checkpoint(id=1, file_snapshots={"a.py": "empty"})
+        checkpoint2 = Checkpoint(
+            id=2, file_snapshots={"b/__init__.py": "empty", "c/__init__.py": "empty"}
+        )
+
+        self.mock_storage.load_checkpoint.side_effect = [checkpoint1, checkpoint2]
+        self.mock_storage.load_file_snapshot.side_effect = lambda h: ""
+
+        changes = self.comparison_service.compare_checkpoints(1, 2)
+
+        assert sorted((c.file_path, c.change_type) for c in changes) == [
+            ("a.py", "deleted"),
+            ("b/__init__.py", "added"),
+            ("c/__init__.py", "added"),
+        ]
+        self.mock_storage.load_file_snapshot.assert_called_once_with("empty")
+
     def test_compare_checkpoints_nonexistent_checkpoint(self):
         """Test checkpoint comparison with nonexistent checkpoint."""
         self.mock_storage.load_checkpoint.side_effect = [None, None]
@@ -243,7 +290,7 @@ class TestComparisonService:
         self.mock_file_service.read_file_content.side_effect = mock_read_file_content
 
         # Compare with current
-        changes = self.comparison_service.compare_with_current(1)
+        changes = self.comparison_service.compare_with_current(1, include_content=True)
 
         # Verify changes
         assert len(changes) == 3
@@ -291,6 +338,27 @@ class TestComparisonService:
         assert changes[0].change_type == "modified"
         assert changes[0].diff == mock_diff
 
+    def test_compare_with_current_with_snapshot(self):
+        """Test comparing with current state using a provided snapshot."""
+        checkpoint = Checkpoint(id=1, file_snapshots={"file1.py": "hash1"})
+
+        self.mock_storage.load_checkpoint.return_value = checkpoint
+        self.mock_storage.load_file_snapshot.return_value = "old_content"
+        self.mock_file_service.read_file_content.return_value = "new_content"
+
+        snapshot = ProjectSnapshot(
+            files={"file1.py": self.temp_dir / "file1.py"},
+            mtimes={"file1.py": 0.0},
+        )
+        changes = self.comparison_service.compare_with_current(1, snapshot=snapshot)
+
+        self.mock_file_service.get_project_files.assert_not_called()
+        self.mock_file_service.read_file_content.assert_called_once_with(
+            self.temp_dir / "file1.py"
+        )
+        assert len(changes) == 1
+        assert changes[0].change_type == "modified"
+
     def test_compare_with_current_nonexistent_checkpoint(self):
         """Test comparing nonexistent checkpoint with current state."""
         self.mock_storage.load_checkpoint.return_value = None
@@ -313,6 +381,80 @@ class TestComparisonService:
         with pytest.raises(ComparisonError):
             self.comparison_service.compare_with_current(1)
 
+    def test_compare_with_current_skips_files_matching_hash(self):
+        """Test that files unchanged since the checkpoint are not loaded."""
+        checkpoint = Checkpoint(
+            id=1, file_snapshots={"same.py": "hash1", "edited.py": "hash2"}
+        )
+
+        self.mock_storage.load_checkpoint.return_value = checkpoint
+        self.mock_storage.hash_file.side_effect = lambda path: (
+            "hash1" if path.name == "same.py" else "other"
+        )
+        self.mock_storage.load_file_snapshot.return_value = "old_content"
+        self.mock_file_service.get_project_files.return_value = [
+            self.temp_dir / "same.py",
+            self.temp_dir / "edited.py",
+        ]
+        self.mock_file_service.read_file_content.return_value = "new_content"
+        for name in ("same.py", "edited.py"):
+            (self.temp_dir / name).write_text(name)
+
+        changes = self.comparison_service.compare_with_current(1)
+
+        assert [c.file_path for c in changes] == ["edited.py"]
+        self.mock_storage.load_file_snapshot.assert_called_once_with("hash2")
+        self.mock_file_service.read_file_content.assert_called_once_with(
+            self.temp_dir / "edited.py"
+        )
+
+    def test_compare_with_current_reuses_hashes_of_unchanged_files(self):
+        """Test that settled files are only hashed once across comparisons."""
+        checkpoint = Checkpoint(id=1, file_snapshots={"old.py": "h1", "new.py": "h2"})
+        old_file = self.temp_dir / "old.py"
+        new_file = self.temp_dir / "new.py"
+        old_file.write_text("old")
+        new_file.write_text("new")
+        os.utime(old_file, (0, 0))
+
+        self.mock_storage.load_checkpoint.return_value = checkpoint
+        self.mock_storage.hash_file.side_effect = lambda path: (
+            "h1" if path == old_file else "h2"
+        )
+        self.mock_file_service.get_project_files.return_value = [old_file, new_file]
+
+        for _ in range(2):
+            assert self.comparison_service.compare_with_current(1) == []
+
+        # Recently modified files may still change within the same mtime
+        hashed = [c.args[0] for c in self.mock_storage.hash_file.call_args_list]
+        assert sorted(hashed) == [new_file, new_file, old_file]
+
+    def test_compare_with_current_loads_in_batches(self):
+        """Test comparing more files than fit in one load batch."""
+        count = LOAD_BATCH_SIZE * 3 + 1
+        names = [f"file{i:03d}.py" for i in range(count)]
+        checkpoint = Checkpoint(
+            id=1, file_snapshots={name: f"hash-{name}" for name in names}
+        )
+
+        self.mock_storage.load_checkpoint.return_value = checkpoint
+        self.mock_storage.load_file_snapshot.side_effect = lambda h: f"old {h}"
+        self.mock_file_service.get_project_files.return_value = [
+            self.temp_dir / name for name in names
+        ]
+        self.mock_file_service.read_file_content.side_effect = lambda path: (
+            f"new {path.name}"
+        )
+
+        changes = self.comparison_service.compare_with_current(1, include_content=True)
+
+        assert [c.file_path for c in changes] == names
+        for change in changes:
+            assert change.change_type == "modified"
+            assert change.old_content == f"old hash-{change.file_path}"
+            assert change.new_content == f"new {change.file_path}"
+
     def test_compare_with_current_unreadable_current_file(self):
         """Test comparing with current when current file is unreadable."""
         checkpoint = Checkpoint(id=1, file_snapshots={"file1.py": "hash1"})
@@ -325,7 +467,7 @@ class TestComparisonService:
         self.mock_file_service.read_file_content.return_value = None  # Unreadable
 
         # Should still work, treating unreadable file as deleted
-        changes = self.comparison_service.compare_with_current(1)
+        changes = self.comparison_service.compare_with_current(1, include_content=True)
 
         assert len(changes) == 1
         assert changes[0].file_path == "file1.py"
@@ -372,7 +514,9 @@ class TestComparisonService:
         self.mock_storage.load_file_snapshot.side_effect = mock_load_file_snapshot
 
         # Compare checkpoints
-        changes = self.comparison_service.compare_checkpoints(1, 2)
+        changes = self.comparison_service.compare_checkpoints(
+            1, 2, include_content=True
+        )
 
         # Verify changes
         assert len(changes) == 4
@@ -433,3 +577,48 @@ class TestComparisonService:
         # Test rich diff
         self.comparison_service.compare_checkpoints(1, 2, use_rich=True)
         self.mock_file_service.generate_diff_rich.assert_called_once_with("old", "new")
+
+    def test_compare_checkpoints_reports_path_order(self):
+        """Test that changes are reported in file path order."""
+        checkpoint1 = Checkpoint(
+            id=1, file_snapshots={"b.py": "old_b", "d.py": "old_d", "c.py": "c"}
+        )
+        checkpoint2 = Checkpoint(
+            id=2, file_snapshots={"b.py": "new_b", "a.py": "new_a", "c.py": "c"}
+        )
+        self.mock_storage.load_checkpoint.side_effect = [checkpoint1, checkpoint2]
+        self.mock_storage.load_file_snapshot.side_effect = lambda h: f"{h}\n"
+        self.mock_file_service.generate_diff.return_value = "diff"
+
+        changes = self.comparison_service.compare_checkpoints(1, 2)
+
+        assert [c.file_path for c in changes] == ["a.py", "b.py", "d.py"]
+        assert [c.change_type for c in changes] == ["added", "modified", "deleted"]
+
+    def test_compare_checkpoints_omits_content_by_default(self):
+        """Test that only the diff is kept unless content is requested."""
+        checkpoint1 = Checkpoint(id=1, file_snapshots={"file1.py": "hash1"})
+        checkpoint2 = Checkpoint(id=2, file_snapshots={"file1.py": "hash2"})
+
+        self.mock_storage.load_checkpoint.side_effect = [
+            checkpoint1,
+            checkpoint2,
+            checkpoint1,
+            checkpoint2,
+        ]
+        self.mock_storage.load_file_snapshot.side_effect = lambda h: h
+        self.mock_file_service.generate_diff.return_value = "diff"
+        self.mock_file_service.generate_diff_rich.return_value = "rich diff"
+
+        changes = self.comparison_service.compare_checkpoints(1, 2)
+        assert changes[0].diff == "diff"
+        assert changes[0].old_content is None
+        assert changes[0].new_content is None
+
+        # Rich diffs never carry content, even when it is requested
+        changes = self.comparison_service.compare_checkpoints(
+            1, 2, use_rich=True, include_content=True
+        )
+        assert changes[0].diff == "rich diff"
+        assert changes[0].old_content is None
+        assert changes[0].new_content is None
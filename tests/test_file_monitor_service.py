@@ -0,0 +1,226 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from codesnap.config import Config
+from codesnap.models import ProjectSnapshot
+from codesnap.services.file_monitor_service import FileMonitorService, INotify
+from codesnap.services.file_service import FileService
+
+
+class TestFileMonitorService:
+    """Test cases for the FileMonitorService class using polling."""
+
+    def setup_method(self):
+        """Set up test environment before each test."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.config = Config(project_root=self.temp_dir)
+        self.file_service = FileService(self.config)
+        self.monitor = FileMonitorService(self.config, self.file_service)
+        self.inotify_patch = patch(
+            "codesnap.services.file_monitor_service.INotify", None
+        )
+        self.inotify_patch.start()
+
+    def teardown_method(self):
+        """Clean up test environment after each test."""
+        self.inotify_patch.stop()
+        if self.temp_dir.exists():
+            shutil.rmtree(self.temp_dir)
+
+    def _touch_later(self, file_path: Path) -> None:
+        """Bump a file's modification time past its recorded state."""
+        stat = file_path.stat()
+        os.utime(file_path, (stat.st_atime, stat.st_mtime + 10))
+
+    def test_get_changed_files(self):
+        """Test detecting modified, added and deleted files."""
+        (self.temp_dir / "modified.py").write_text("old")
+        (self.temp_dir / "deleted.py").write_text("old")
+        (self.temp_dir / "unchanged.py").write_text("old")
+
+        self.monitor.start_monitoring()
+        self._touch_later(self.temp_dir / "modified.py")
+        (self.temp_dir / "deleted.py").unlink()
+        (self.temp_dir / "added.py").write_text("new")
+
+        assert self.monitor.get_changed_files() == {
+            "modified.py",
+            "deleted.py",
+            "added.py",
+        }
+
+    def test_stop_monitoring_checks_final_changes(self):
+        """Test that stopping monitoring picks up outstanding changes."""
+        (self.temp_dir / "file.py").write_text("old")
+
+        self.monitor.start_monitoring()
+        self._touch_later(self.temp_dir / "file.py")
+
+        assert self.monitor.stop_monitoring() == {"file.py"}
+        assert not self.monitor.is_monitoring
+
+    def test_is_file_changed_tracked_file_skips_scan(self):
+        """Test that tracked files are checked without a project scan."""
+        (self.temp_dir / "file.py").write_text("old")
+        (self.temp_dir / "other.py").write_text("old")
+
+        self.monitor.start_monitoring()
+        self._touch_later(self.temp_dir / "file.py")
+
+        with patch.object(self.file_service, "get_project_files") as mock_get_files:
+            assert self.monitor.is_file_changed("file.py")
+            assert not self.monitor.is_file_changed("other.py")
+            mock_get_files.assert_not_called()
+
+    def test_is_file_changed_new_file(self):
+        """Test that untracked files fall back to a project scan."""
+        self.monitor.start_monitoring()
+        (self.temp_dir / "new.py").write_text("new")
+
+        assert self.monitor.is_file_changed("new.py")
+
+    def test_check_for_changes_is_throttled(self):
+        """Test that repeated checks within the interval reuse the last scan."""
+        self.monitor.start_monitoring()
+
+        with patch.object(
+            self.file_service, "get_project_files", return_value=[]
+        ) as mock_get_files:
+            self.monitor._check_for_changes()
+            self.monitor._check_for_changes()
+            assert mock_get_files.call_count == 1
+
+            self.monitor._check_for_changes(force=True)
+            assert mock_get_files.call_count == 2
+
+    def test_get_changed_files_with_snapshot(self):
+        """Test that a provided snapshot is used instead of a new scan."""
+        (self.temp_dir / "file.py").write_text("old")
+        self.monitor.start_monitoring()
+        initial_mod_time = self.monitor.initial_file_states["file.py"]
+
+        snapshot = ProjectSnapshot(
+            files={"new.py": self.temp_dir / "new.py"},
+            mtimes={"new.py": initial_mod_time},
+        )
+        with patch.object(self.file_service, "get_project_files") as mock_get_files:
+            changed = self.monitor.get_changed_files(snapshot=snapshot)
+            mock_get_files.assert_not_called()
+
+        assert changed == {"file.py", "new.py"}
+
+
+@pytest.mark.skipif(INotify is None, reason="inotify_simple is not installed")
+class TestFileMonitorServiceInotify:
+    """Test cases for the FileMonitorService class using inotify events."""
+
+    def setup_method(self):
+        """Set up test environment before each test."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.config = Config(project_root=self.temp_dir)
+        self.file_service = FileService(self.config)
+        self.monitor = FileMonitorService(self.config, self.file_service)
+
+    def teardown_method(self):
+        """Clean up test environment after each test."""
+        self.monitor._stop_watching()
+        if self.temp_dir.exists():
+            shutil.rmtree(self.temp_dir)
+
+    def test_get_changed_files_from_events(self):
+        """Test detecting changes from inotify events without rescanning."""
+        (self.temp_dir / "modified.py").write_text("old")
+        (self.temp_dir / "deleted.py").write_text("old")
+        (self.temp_dir / "unchanged.py").write_text("old")
+        (self.temp_dir / "src").mkdir()
+
+        self.monitor.start_monitoring()
+        assert self.monitor._inotify is not None
+
+        (self.temp_dir / "modified.py").write_text("new")
+        (self.temp_dir / "deleted.py").unlink()
+        (self.temp_dir / "src" / "added.py").write_text("new")
+        (self.temp_dir / "temp.py").write_text("new")
+        (self.temp_dir / "temp.py").unlink()
+
+        with patch.object(self.file_service, "get_project_files") as mock_get_files:
+            changed = self.monitor.get_changed_files()
+            mock_get_files.assert_not_called()
+
+        assert changed == {
+            "modified.py",
+            "deleted.py",
+            str(Path("src") / "added.py"),
+        }
+
+    def test_new_directory_is_watched(self):
+        """Test that files in directories created while monitoring are seen."""
+        self.monitor.start_monitoring()
+
+        new_dir = self.temp_dir / "pkg"
+        new_dir.mkdir()
+        (new_dir / "first.py").write_text("new")
+        self.monitor.get_changed_files()
+        (new_dir / "second.py").write_text("new")
+
+        assert self.monitor.stop_monitoring() == {
+            str(Path("pkg") / "first.py"),
+            str(Path("pkg") / "second.py"),
+        }
+        assert self.monitor._inotify is None
+
+    def test_moved_directory_is_unwatched(self):
+        """Test that a directory moved out of the project stops being watched."""
+        (self.temp_dir / "pkg" / "sub").mkdir(parents=True)
+        (self.temp_dir / "pkg" / "sub" / "mod.py").write_text("old")
+        outside = Path(tempfile.mkdtemp())
+        self.monitor.start_monitoring()
+
+        try:
+            (self.temp_dir / "pkg").rename(outside / "pkg")
+            assert self.monitor.get_changed_files() == {
+                str(Path("pkg") / "sub" / "mod.py")
+            }
+            assert set(self.monitor._watched_dirs.values()) == {self.temp_dir}
+
+            (outside / "pkg" / "sub" / "new.py").write_text("new")
+            assert self.monitor.get_changed_files() == {
+                str(Path("pkg") / "sub" / "mod.py")
+            }
+        finally:
+            shutil.rmtree(outside)
+
+    def test_watch_failure_falls_back_to_scanning(self):
+        """Test that a failed watch on a new directory switches to polling."""
+        self.monitor.start_monitoring()
+        (self.temp_dir / "pkg").mkdir()
+        (self.temp_dir / "pkg" / "mod.py").write_text("new")
+
+        with patch.object(
+            self.monitor, "_watch_tree", side_effect=OSError(28, "No space left")
+        ):
+            changed = self.monitor.get_changed_files()
+
+        assert changed == {str(Path("pkg") / "mod.py")}
+        assert self.monitor._inotify is None
+        (self.temp_dir / "later.py").write_text("new")
+        assert self.monitor.stop_monitoring() == {
+            str(Path("pkg") / "mod.py"),
+            "later.py",
+        }
+
+    def test_ignored_paths_are_skipped(self):
+        """Test that events for ignored paths are not reported."""
+        (self.temp_dir / "__pycache__").mkdir()
+        self.monitor.start_monitoring()
+
+        (self.temp_dir / "__pycache__" / "mod.pyc").write_bytes(b"")
+        (self.temp_dir / "node_modules").mkdir()
+        (self.temp_dir / "node_modules" / "pkg.js").write_text("")
+
+        assert self.monitor.get_changed_files() == set()
@@ -1,13 +1,24 @@
+import difflib
+import os
 import shutil
 import tempfile
 from pathlib import Path
 from unittest.mock import patch
 
+import pathspec
 import pytest
 from rich.text import Text
 
 from codesnap.config import Config
-from codesnap.services.file_service import FileService
+from codesnap.services.file_service import (
+    LARGE_DIFF_THRESHOLD,
+    SMALL_FILE_SIZE,
+    TEXT_SNIFF_SIZE,
+    FileService,
+    _dmp_opcodes,
+    _unified_diff,
+    diff_match_patch,
+)
 from codesnap.services.interfaces import FileServiceError
 
 
@@ -62,6 +73,15 @@ class TestFileService:
         assert self.file_service.is_ignored(Path(self.temp_dir / "temp_file.txt"))
         assert not self.file_service.is_ignored(Path(self.temp_dir / "main.py"))
 
+    def test_is_ignored_sees_patterns_added_later(self):
+        """Test that patterns added after a check still apply."""
+        path = Path(self.temp_dir / "notes.bak")
+        assert not self.file_service.is_ignored(path)
+
+        self.file_service.ignore_patterns.add("*.bak")
+
+        assert self.file_service.is_ignored(path)
+
     def test_load_pathspec_with_gitignore(self):
         """Test loading pathspec from .gitignore file."""
         # Create .gitignore file
@@ -73,13 +93,59 @@ class TestFileService:
         config = Config(project_root=self.temp_dir, include_gitignore=True)
         file_service = FileService(config)
 
-        assert file_service.pathspec is not None
+        assert isinstance(file_service.pathspec, pathspec.GitIgnoreSpec)
 
         # Test that gitignore patterns are respected
         assert file_service.is_ignored(Path(self.temp_dir / "error.log"))
         assert file_service.is_ignored(Path(self.temp_dir / "test.tmp"))
         assert file_service.is_ignored(Path(self.temp_dir / "test_dir" / "file.txt"))
 
+    def test_is_ignored_caches_directory_decisions(self):
+        """Test that gitignored directories are cached and inherited."""
+        (self.temp_dir / ".gitignore").write_text("build/\n")
+        file_service = FileService(Config(project_root=self.temp_dir))
+
+        assert file_service.is_ignored(self.temp_dir / "build" / "a" / "x.py")
+        assert file_service.is_ignored(self.temp_dir / "build" / "y.py")
+        assert not file_service.is_ignored(self.temp_dir / "src" / "z.py")
+        assert file_service._dir_ignored_cache == {
+            "build": True,
+            "build/a": True,
+            "src": False,
+        }
+
+    def test_load_pathspec_is_cached_until_modified(self):
+        """Test that an unchanged .gitignore is only compiled once."""
+        gitignore_path = self.temp_dir / ".gitignore"
+        gitignore_path.write_text("*.log\n")
+
+        first = FileService(Config(project_root=self.temp_dir))
+        second = FileService(Config(project_root=self.temp_dir))
+        assert first.pathspec is second.pathspec
+
+        gitignore_path.write_text("*.tmp\n")
+        stat = gitignore_path.stat()
+        os.utime(gitignore_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        third = FileService(Config(project_root=self.temp_dir))
+        assert third.pathspec is not first.pathspec
+        assert third.is_ignored(self.temp_dir / "test.tmp")
+        assert not third.is_ignored(self.temp_dir / "error.log")
+
+    def test_load_pathspec_recompiles_same_mtime_edit(self):
+        """Test that an edit keeping the mtime but not the size is seen."""
+        gitignore_path = self.temp_dir / ".gitignore"
+        gitignore_path.write_text("*.log\n")
+        stat = gitignore_path.stat()
+        first = FileService(Config(project_root=self.temp_dir))
+
+        gitignore_path.write_text("*.log\n*.tmp\n")
+        os.utime(gitignore_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        second = FileService(Config(project_root=self.temp_dir))
+        assert second.pathspec is not first.pathspec
+        assert second.is_ignored(self.temp_dir / "test.tmp")
+
     def test_load_pathspec_without_gitignore(self):
         """Test that pathspec is not loaded when gitignore is disabled."""
         config = Config(project_root=self.temp_dir, include_gitignore=False)
@@ -140,14 +206,98 @@ class TestFileService:
         assert len(files) == 2
         assert all(f.parent == subdir for f in files)
 
+    def test_iter_relative_project_files(self):
+        """Test that relative paths match those derived from get_project_files."""
+        (self.temp_dir / ".gitignore").write_text("*.log\n")
+        (self.temp_dir / "src" / "pkg").mkdir(parents=True)
+        (self.temp_dir / "src" / "pkg" / "mod.py").write_text("")
+        (self.temp_dir / "src" / "main.py").write_text("")
+        (self.temp_dir / "src" / "debug.log").write_text("")
+        file_service = FileService(self.config)
+        subdir = self.temp_dir / "src"
+
+        relative_files = set(file_service.iter_relative_project_files(root=subdir))
+
+        assert relative_files == {
+            str(Path("pkg") / "mod.py"),
+            "main.py",
+        }
+        assert relative_files == {
+            str(f.relative_to(subdir)) for f in file_service.get_project_files(subdir)
+        }
+
+    def test_get_project_files_prunes_ignored_directories(self):
+        """Test that ignored directories are not descended into."""
+        (self.temp_dir / ".gitignore").write_text("build/\n*.log\n")
+        for directory in ["src", "build", "node_modules", "src/temp_dir"]:
+            (self.temp_dir / directory).mkdir()
+        (self.temp_dir / "src" / "main.py").write_text("")
+        (self.temp_dir / "src" / "debug.log").write_text("")
+        (self.temp_dir / "src" / "temp_dir" / "kept.py").write_text("")
+        (self.temp_dir / "build" / "out.py").write_text("")
+        (self.temp_dir / "node_modules" / "pkg.js").write_text("")
+
+        file_service = FileService(self.config)
+        file_service.ignore_patterns.add("temp_*")
+        scanned = []
+        real_scandir = os.scandir
+
+        def tracking_scandir(path):
+            scanned.append(Path(path))
+            return real_scandir(path)
+
+        with patch("os.scandir", side_effect=tracking_scandir):
+            files = file_service.get_project_files()
+
+        assert sorted(files) == sorted(
+            [
+                self.temp_dir / ".gitignore",
+                self.temp_dir / "src" / "main.py",
+                # Wildcard patterns only apply to file names
+                self.temp_dir / "src" / "temp_dir" / "kept.py",
+            ]
+        )
+        assert self.temp_dir / "build" not in scanned
+        assert self.temp_dir / "node_modules" not in scanned
+
+    def test_get_project_files_skips_symlinked_directories(self):
+        """Test that symlinked directories are not followed."""
+        (self.temp_dir / "real").mkdir()
+        (self.temp_dir / "real" / "file.py").write_text("")
+        (self.temp_dir / "link").symlink_to(self.temp_dir / "real")
+
+        files = self.file_service.get_project_files()
+
+        assert files == [self.temp_dir / "real" / "file.py"]
+
+    def test_get_project_files_missing_root(self):
+        """Test that a missing root yields no files, as os.walk did."""
+        assert self.file_service.get_project_files(self.temp_dir / "missing") == []
+
     def test_get_project_files_with_error(self):
         """Test handling of errors when getting project files."""
-        with patch("os.walk") as mock_walk:
-            mock_walk.side_effect = Exception("Permission denied")
+        with patch("os.scandir") as mock_scandir:
+            mock_scandir.side_effect = Exception("Permission denied")
 
             with pytest.raises(FileServiceError):
                 self.file_service.get_project_files()
 
+    def test_snapshot(self):
+        """Test capturing project files and modification times."""
+        (self.temp_dir / "main.py").write_text("print('hello')")
+        (self.temp_dir / "src").mkdir()
+        (self.temp_dir / "src" / "lib.py").write_text("pass")
+
+        snapshot = self.file_service.snapshot()
+
+        lib_path = str(Path("src") / "lib.py")
+        assert snapshot.files == {
+            "main.py": self.temp_dir / "main.py",
+            lib_path: self.temp_dir / "src" / "lib.py",
+        }
+        assert snapshot.mtimes["main.py"] == (self.temp_dir / "main.py").stat().st_mtime
+        assert set(snapshot.mtimes) == {"main.py", lib_path}
+
     def test_read_file_content_existing_file(self):
         """Test reading content from existing file."""
         test_content = "test file content"
@@ -157,6 +307,16 @@ class TestFileService:
         content = self.file_service.read_file_content(test_file)
         assert content == test_content
 
+    @pytest.mark.parametrize("size", [10, SMALL_FILE_SIZE + 10])
+    def test_read_file_content_translates_newlines(self, size):
+        """Test that small and large reads both normalize line endings."""
+        test_file = self.temp_dir / "crlf.txt"
+        body = "x" * size
+        test_file.write_bytes(f"{body}\r\nline2\rline3\n".encode())
+
+        content = self.file_service.read_file_content(test_file)
+        assert content == f"{body}\nline2\nline3\n"
+
     def test_read_file_content_nonexistent_file(self):
         """Test reading content from nonexistent file."""
         nonexistent_file = self.temp_dir / "nonexistent.txt"
@@ -181,6 +341,25 @@ class TestFileService:
         content = self.file_service.read_file_content(binary_file)
         assert content is None
 
+    def test_read_file_content_large_binary_file(self):
+        """Test that large binary files are rejected from their first bytes."""
+        binary_file = self.temp_dir / "binary.bin"
+        binary_file.write_bytes(b"\xff\xfe" + b"x" * SMALL_FILE_SIZE)
+
+        with patch("builtins.open") as mock_open:
+            content = self.file_service.read_file_content(binary_file)
+
+        assert content is None
+        mock_open.assert_not_called()
+
+    def test_read_file_content_large_file_split_character(self):
+        """Test that a character spanning the sniffed prefix still decodes."""
+        text_file = self.temp_dir / "text.txt"
+        test_content = "x" * (TEXT_SNIFF_SIZE - 1) + "\u00e9" * SMALL_FILE_SIZE
+        text_file.write_text(test_content, encoding="utf-8")
+
+        assert self.file_service.read_file_content(text_file) == test_content
+
     def test_read_file_content_with_error(self):
         """Test handling of errors when reading file."""
         test_file = self.temp_dir / "test.txt"
@@ -213,6 +392,126 @@ class TestFileService:
         # Should be empty when there are no changes
         assert diff == ""
 
+    @pytest.mark.parametrize(
+        ("old_content", "new_content"),
+        [
+            ("", "line1\nline2\n"),
+            ("", "no trailing newline"),
+            ("line1\nline2", ""),
+            ("single\n", ""),
+            ("", ""),
+        ],
+    )
+    def test_generate_diff_one_sided_matches_difflib(self, old_content, new_content):
+        """Test that pure additions and deletions match difflib's output."""
+        expected = "".join(
+            difflib.unified_diff(
+                old_content.splitlines(keepends=True),
+                new_content.splitlines(keepends=True),
+                fromfile="old",
+                tofile="new",
+            )
+        )
+        expected_rich = "".join(
+            f"{line}\n"
+            for line in difflib.unified_diff(
+                old_content.splitlines(),
+                new_content.splitlines(),
+                fromfile="old",
+                tofile="new",
+                lineterm="",
+            )
+        )
+
+        assert self.file_service.generate_diff(old_content, new_content) == expected
+        assert (
+            str(self.file_service.generate_diff_rich(old_content, new_content))
+            == expected_rich
+        )
+
+    def test_iter_diff(self):
+        """Test that iter_diff yields the lines of generate_diff lazily."""
+        old_content = "line1\nline2\nline3\n"
+        new_content = "line1\nchanged\nline3\n"
+
+        lines = self.file_service.iter_diff(old_content, new_content)
+        assert not isinstance(lines, (str, list))
+        lines = list(lines)
+
+        assert all(line.endswith("\n") for line in lines)
+        assert "".join(lines) == self.file_service.generate_diff(
+            old_content, new_content
+        )
+
+    def test_generate_diff_trims_common_lines(self):
+        """Test that only the edited region is matched, with correct hunks."""
+        old_lines = [f"line {i}\n" for i in range(1000)]
+        new_lines = old_lines.copy()
+        new_lines[500] = "changed\n"
+
+        with patch(
+            "codesnap.services.file_service.SequenceMatcher",
+            wraps=difflib.SequenceMatcher,
+        ) as mock_matcher:
+            result = self.file_service.generate_diff(
+                "".join(old_lines), "".join(new_lines)
+            )
+
+        assert mock_matcher.call_args.args[1:] == ([0], [1])
+        assert result == "".join(
+            difflib.unified_diff(old_lines, new_lines, fromfile="old", tofile="new")
+        )
+
+    def test_unified_diff_matches_difflib(self):
+        """Test that the hunk formatter reproduces difflib's output."""
+        old_lines = [f"line {i}\n" for i in range(30)]
+        new_lines = old_lines[:5] + ["changed\n"] + old_lines[7:20] + old_lines[22:]
+        opcodes = difflib.SequenceMatcher(None, old_lines, new_lines).get_opcodes()
+
+        expected = list(
+            difflib.unified_diff(old_lines, new_lines, fromfile="old", tofile="new")
+        )
+        assert list(_unified_diff(old_lines, new_lines, opcodes, "\n")) == expected
+
+    def test_dmp_opcodes_too_many_distinct_lines(self):
+        """Test that lines beyond the last code point aren't encoded."""
+        # Stands in for more than sys.maxunicode + 1 distinct lines
+        with patch(
+            "codesnap.services.file_service.chr",
+            side_effect=ValueError("chr() arg not in range(0x110000)"),
+            create=True,
+        ):
+            assert _dmp_opcodes(["old\n"], ["new\n"]) is None
+
+    @pytest.mark.skipif(
+        diff_match_patch is None, reason="diff-match-patch is not installed"
+    )
+    def test_generate_diff_large_input(self):
+        """Test that large inputs produce the same diff as difflib."""
+        line_count = LARGE_DIFF_THRESHOLD // 10
+        old_lines = [f"line {i:04d}\n" for i in range(line_count)]
+        new_lines = old_lines.copy()
+        new_lines[line_count // 2] = "changed\n"
+        del new_lines[10]
+        new_lines.append("appended\n")
+
+        expected = "".join(
+            difflib.unified_diff(old_lines, new_lines, fromfile="old", tofile="new")
+        )
+        with patch(
+            "codesnap.services.file_service._dmp_opcodes", wraps=_dmp_opcodes
+        ) as mock_dmp:
+            result = self.file_service.generate_diff(
+                "".join(old_lines), "".join(new_lines)
+            )
+            rich_result = self.file_service.generate_diff_rich(
+                "".join(old_lines), "".join(new_lines)
+            )
+
+        assert result == expected
+        assert str(rich_result) == expected
+        assert mock_dmp.call_count == 2
+
     def test_generate_diff_rich(self):
         """Test generating rich text diff."""
         old_content = "line1\nline2\nline3"
@@ -240,6 +539,43 @@ class TestFileService:
         assert "line2" in diff_str
         assert "modified" in diff_str
 
+    def test_generate_diff_rich_spans(self):
+        """Test that diff lines are styled by prefix, one span per run."""
+        diff_text = self.file_service.generate_diff_rich("a\nb\nc\n", "a\nd\ne\n")
+
+        styled = [
+            (str(diff_text)[span.start : span.end], span.style)
+            for span in diff_text.spans
+        ]
+        assert styled == [
+            ("--- old\n+++ new\n@@ -1,3 +1,3 @@\n", "cyan"),
+            ("-b\n-c\n", "red"),
+            ("+d\n+e\n", "green"),
+        ]
+        assert str(diff_text).endswith(" a\n-b\n-c\n+d\n+e\n")
+
+    def test_generate_diff_rich_matches_difflib(self):
+        """Test that the rich diff text matches difflib across several hunks."""
+        old_lines = [f"line {i}" for i in range(40)] + ["line 0"]
+        new_lines = old_lines[:3] + ["inserted"] + old_lines[3:25] + old_lines[27:]
+
+        expected = "".join(
+            f"{line}\n"
+            for line in difflib.unified_diff(
+                old_lines, new_lines, fromfile="old", tofile="new", lineterm=""
+            )
+        )
+        result = self.file_service.generate_diff_rich(
+            "\n".join(old_lines), "\n".join(new_lines)
+        )
+        assert str(result) == expected
+
+    def test_generate_diff_rich_no_changes(self):
+        """Test generating rich text diff when there are no changes."""
+        diff_text = self.file_service.generate_diff_rich("same", "same")
+
+        assert str(diff_text) == ""
+
     def test_is_ignored_path_outside_project_root(self):
         """Test is_ignored with path outside project root."""
         outside_path = Path("/some/other/path/file.txt")
@@ -70,6 +70,15 @@ class TestCheckpoint:
         checkpoint = Checkpoint(id=1, file_snapshots=snapshots)
         assert checkpoint.file_snapshots == snapshots
 
+    def test_checkpoint_file_snapshots_share_strings(self):
+        """Test that checkpoints loaded from JSON share path and hash strings."""
+        data = Checkpoint(id=1, file_snapshots={"a.py": "f" * 64}).model_dump_json()
+
+        first = Checkpoint.model_validate_json(data)
+        second = Checkpoint.model_validate_json(data)
+
+        assert first.file_snapshots["a.py"] is second.file_snapshots["a.py"]
+
     def test_checkpoint_with_restore_info(self):
         """Test checkpoint with restore information."""
         checkpoint = Checkpoint(id=1, restored_from=2, restore_timestamp=datetime.now())
@@ -0,0 +1,184 @@
+import errno
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from codesnap.config import Config
+from codesnap.models import Checkpoint
+from codesnap.services.file_service import FileService
+from codesnap.services.interfaces import ICheckpointService, RestoreError
+from codesnap.services.restore_service import SMALL_COPY_SIZE, RestoreService
+from codesnap.storage import StorageManager
+
+
+class TestRestoreService:
+    """Test cases for the RestoreService class."""
+
+    def setup_method(self):
+        """Set up test environment before each test."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.project_root = self.temp_dir / "project"
+        self.project_root.mkdir()
+        self.storage = StorageManager(self.temp_dir / ".codesnap")
+        self.file_service = FileService(Config(project_root=self.project_root))
+        self.mock_checkpoint_service = Mock(spec=ICheckpointService)
+        self.mock_checkpoint_service.project_root = self.project_root
+        self.mock_checkpoint_service.file_service = self.file_service
+        self.restore_service = RestoreService(
+            self.storage, self.mock_checkpoint_service
+        )
+
+    def teardown_method(self):
+        """Clean up test environment after each test."""
+        if self.temp_dir.exists():
+            shutil.rmtree(self.temp_dir)
+
+    def _save_checkpoint(self, checkpoint_id: int, files: dict[str, str]) -> None:
+        """Save a checkpoint whose snapshots hold the given file contents."""
+        checkpoint = Checkpoint(
+            id=checkpoint_id,
+            file_snapshots={
+                path: self.storage.save_file_snapshot(content)
+                for path, content in files.items()
+            },
+        )
+        self.storage.save_checkpoint(checkpoint)
+
+    def test_restore_checkpoint(self):
+        """Test restoring files, creating directories and deleting extras."""
+        self._save_checkpoint(
+            1,
+            {
+                "main.py": "print('v1')",
+                str(Path("pkg") / "sub" / "mod.py"): "x = 1",
+            },
+        )
+        (self.project_root / "main.py").write_text("print('v2')")
+        (self.project_root / "extra.py").write_text("extra")
+
+        assert self.restore_service.restore_checkpoint(1)
+
+        assert (self.project_root / "main.py").read_text() == "print('v1')"
+        assert (self.project_root / "pkg" / "sub" / "mod.py").read_text() == "x = 1"
+        assert not (self.project_root / "extra.py").exists()
+
+    def test_restore_checkpoint_deletes_nested_files(self):
+        """Test that stale files across several directories are removed."""
+        self._save_checkpoint(1, {"main.py": "v1"})
+        for directory in ["a", "a/b", "c"]:
+            (self.project_root / directory).mkdir()
+        stale_files = ["a/one.py", "a/two.py", "a/b/three.py", "c/four.py"]
+        for stale_file in stale_files:
+            (self.project_root / stale_file).write_text("stale")
+
+        self.restore_service.restore_checkpoint(1)
+
+        assert not any((self.project_root / f).exists() for f in stale_files)
+        assert (self.project_root / "main.py").read_text() == "v1"
+
+    def test_restore_checkpoint_directory_replaced_by_file(self):
+        """Test restoring a directory that was later replaced by a file."""
+        self._save_checkpoint(1, {str(Path("pkg") / "mod.py"): "x = 1"})
+        (self.project_root / "pkg").write_text("not a directory")
+
+        assert self.restore_service.restore_checkpoint(1)
+
+        assert (self.project_root / "pkg" / "mod.py").read_text() == "x = 1"
+
+    def test_restore_checkpoint_copies_shared_snapshots(self):
+        """Test that files sharing a snapshot are independent copies."""
+        self._save_checkpoint(1, {"a.py": "same\n", "b.py": "same\n"})
+
+        self.restore_service.restore_checkpoint(1)
+        (self.project_root / "a.py").write_text("edited\n")
+
+        assert (self.project_root / "b.py").read_text() == "same\n"
+        content_hash = self.storage.save_file_snapshot("same\n")
+        assert self.storage.load_file_snapshot(content_hash) == "same\n"
+
+    def test_restore_checkpoint_text_mode_write(self):
+        """Test that snapshots are written in text mode without raw copies."""
+        self._save_checkpoint(1, {"main.py": "line1\nline2\n"})
+
+        with (
+            patch("codesnap.services.restore_service.RAW_SNAPSHOT_COPY", False),
+            patch.object(
+                self.storage,
+                "load_file_snapshot",
+                wraps=self.storage.load_file_snapshot,
+            ) as mock_load,
+        ):
+            assert self.restore_service.restore_checkpoint(1)
+
+        mock_load.assert_called_once()
+        assert (self.project_root / "main.py").read_text() == "line1\nline2\n"
+
+    def test_restore_checkpoint_skips_unchanged_files(self):
+        """Test that files already matching the checkpoint aren't rewritten."""
+        self._save_checkpoint(1, {"same.py": "v1", "changed.py": "v1"})
+        for name, content in [("same.py", "v1"), ("changed.py", "v2")]:
+            (self.project_root / name).write_text(content)
+            os.utime(self.project_root / name, ns=(0, 0))
+
+        self.restore_service.restore_checkpoint(1)
+
+        assert (self.project_root / "same.py").stat().st_mtime_ns == 0
+        assert (self.project_root / "changed.py").stat().st_mtime_ns != 0
+        assert (self.project_root / "changed.py").read_text() == "v1"
+
+    def test_restore_checkpoint_large_file(self):
+        """Test restoring a file above the single-write size."""
+        content = "x = 1\n" * (SMALL_COPY_SIZE // 3)
+        self._save_checkpoint(1, {"big.py": content})
+        (self.project_root / "big.py").write_text("short")
+
+        self.restore_service.restore_checkpoint(1)
+
+        assert (self.project_root / "big.py").read_text() == content
+
+    @pytest.mark.skipif(
+        not hasattr(os, "copy_file_range"), reason="copy_file_range is Linux only"
+    )
+    @pytest.mark.parametrize("copy_error", [None, OSError(errno.EXDEV, "cross")])
+    def test_restore_checkpoint_large_file_without_clone(self, copy_error):
+        """Test copying large files in the kernel, or in Python as a fallback."""
+        content = "x = 1\n" * (SMALL_COPY_SIZE // 3)
+        self._save_checkpoint(1, {"big.py": content})
+        copy_file_range = Mock(wraps=os.copy_file_range, side_effect=copy_error)
+
+        with (
+            patch("codesnap.services.restore_service._clone", return_value=False),
+            patch("codesnap.services.restore_service.COPY_FILE_RANGE", copy_file_range),
+        ):
+            self.restore_service.restore_checkpoint(1)
+
+        assert (self.project_root / "big.py").read_text() == content
+        copy_file_range.assert_called()
+
+    def test_restore_checkpoint_to_custom_path(self):
+        """Test restoring into a separate output directory."""
+        self._save_checkpoint(1, {"main.py": "print('v1')"})
+        output_dir = self.temp_dir / "output"
+
+        assert self.restore_service.restore_checkpoint(1, output_dir)
+
+        assert (output_dir / "main.py").read_text() == "print('v1')"
+
+    def test_restore_checkpoint_removes_later_checkpoints(self):
+        """Test that checkpoints newer than the restored one are deleted."""
+        self._save_checkpoint(1, {"main.py": "v1"})
+        self._save_checkpoint(2, {"main.py": "v2"})
+
+        self.restore_service.restore_checkpoint(1)
+
+        assert self.storage.load_checkpoint(1) is not None
+        assert self.storage.load_checkpoint(2) is None
+
+    def test_restore_nonexistent_checkpoint(self):
+        """Test restoring a checkpoint that doesn't exist."""
+        with pytest.raises(RestoreError):
+            self.restore_service.restore_checkpoint(99)
@@ -1,10 +1,27 @@
-import json
+import gzip
+import hashlib
+import os
 import shutil
+import stat
 import tempfile
+import time
 from datetime import datetime
 from pathlib import Path
+from unittest.mock import Mock, patch
 
-from codesnap.storage import StorageManager
+import pytest
+from pydantic import ValidationError
+
+from codesnap.config import MTIME_TRUST_MIN_AGE_NS
+from codesnap.models import Checkpoint, CodeChange, ExportFormat, Prompt
+from codesnap.storage import (
+    HASH_CHUNK_CHARS,
+    PARALLEL_HASH_SIZE,
+    PARALLEL_LOAD_THRESHOLD,
+    SHARDED_LAYOUT_MARKER,
+    StorageManager,
+    blake3,
+)
 
 
 class TestStorageManager:
@@ -27,29 +44,16 @@ class TestStorageManager:
         assert storage.checkpoints_dir.exists()
         assert storage.files_dir.exists()
 
-    def test_storage_manager_creation_without_path(self):
+    def test_storage_manager_creation_without_path(self, monkeypatch):
         """Test storage manager creation without custom path."""
-        # Save original cwd
-        original_cwd = Path.cwd()
-
-        try:
-            # Change to temp directory
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
-                import os
-
-                os.chdir(temp_path)
-
-                storage = StorageManager()
-                expected_path = temp_path / ".codesnap"
-                assert storage.base_path == expected_path
-                assert storage.checkpoints_dir.exists()
-                assert storage.files_dir.exists()
-        finally:
-            # Restore original cwd
-            import os
+        project_root = self.temp_dir / "project"
+        project_root.mkdir()
+        monkeypatch.chdir(project_root)
 
-            os.chdir(original_cwd)
+        storage = StorageManager()
+        assert storage.base_path == project_root / ".codesnap"
+        assert storage.checkpoints_dir.exists()
+        assert storage.files_dir.exists()
 
     def test_checkpoints_dir_property(self):
         """Test checkpoints_dir property."""
@@ -63,7 +67,25 @@ class TestStorageManager:
         hash2 = self.storage._get_file_hash(content)
 
         assert hash1 == hash2
-        assert len(hash1) == 64  # SHA-256 hash length
+        assert len(hash1) == 64  # BLAKE3 and SHA-256 hex digest length
+
+    def test_get_file_hash_matches_sha256(self):
+        """Test that chunked hashing matches hashing the whole encoding."""
+        content = "héllo wörld ✓\n" * (HASH_CHUNK_CHARS // 5)
+        expected = hashlib.sha256(content.encode()).hexdigest()
+
+        with patch("codesnap.storage.blake3", None):
+            assert self.storage._get_file_hash(content) == expected
+            assert self.storage._get_file_hash(content.encode()) == expected
+
+    @pytest.mark.skipif(blake3 is None, reason="blake3 is not installed")
+    def test_get_file_hash_uses_blake3(self):
+        """Test that BLAKE3 is used for content addressing when available."""
+        content = "x" * PARALLEL_HASH_SIZE
+        expected = blake3(content.encode()).hexdigest()
+
+        assert self.storage._get_file_hash(content) == expected
+        assert self.storage._get_file_hash("small") == blake3(b"small").hexdigest()
 
     def test_get_file_hash_different_content(self):
         """Test file hash generation with different content."""
@@ -75,44 +97,13 @@ class TestStorageManager:
 
         assert hash1 != hash2
 
-    def test_save_json(self):
-        """Test saving data as JSON."""
-        test_data = {"key": "value", "number": 42, "list": [1, 2, 3]}
-        file_path = self.temp_dir / "test.json"
-
-        self.storage._save_json(file_path, test_data)
-
-        assert file_path.exists()
-        with open(file_path) as f:
-            loaded_data = json.load(f)
-        assert loaded_data == test_data
-
-    def test_load_json_existing_file(self):
-        """Test loading JSON data from existing file."""
-        test_data = {"key": "value", "number": 42}
-        file_path = self.temp_dir / "test.json"
-
-        # Save data first
-        with open(file_path, "w") as f:
-            json.dump(test_data, f)
-
-        # Load data
-        loaded_data = self.storage._load_json(file_path)
-        assert loaded_data == test_data
-
-    def test_load_json_nonexistent_file(self):
-        """Test loading JSON data from nonexistent file."""
-        file_path = self.temp_dir / "nonexistent.json"
-        loaded_data = self.storage._load_json(file_path)
-        assert loaded_data == {}
-
     def test_directories_created_on_init(self):
         """Test that required directories are created on initialization."""
         # Delete directories to test creation
         if self.storage.checkpoints_dir.exists():
             self.storage.checkpoints_dir.rmdir()
         if self.storage.files_dir.exists():
-            self.storage.files_dir.rmdir()
+            shutil.rmtree(self.storage.files_dir)
 
         # Create new storage manager
         storage = StorageManager(self.temp_dir)
@@ -132,21 +123,326 @@ class TestStorageManager:
         assert storage.base_path.exists()
         assert storage.base_path.is_dir()
 
-    def test_file_hash_consistency(self):
-        """Test that file hash generation is consistent."""
-        content = "consistent content"
+    def test_checkpoint_round_trip(self):
+        """Test saving and loading a checkpoint, including non-JSON metadata."""
+        checkpoint = Checkpoint(
+            id=1,
+            file_snapshots={"main.py": "abc"},
+            metadata={"path": Path("src")},
+        )
+
+        self.storage.save_checkpoint(checkpoint)
+        loaded = self.storage.load_checkpoint(1)
+
+        assert loaded == checkpoint.model_copy(update={"metadata": {"path": "src"}})
+        assert self.storage.load_checkpoint(2) is None
+
+    def _age_checkpoints_dir(self):
+        """Backdate the checkpoints directory past the racy-mtime window."""
+        old_ns = time.time_ns() - 2 * MTIME_TRUST_MIN_AGE_NS
+        os.utime(self.storage.checkpoints_dir, ns=(old_ns, old_ns))
+
+    def test_list_checkpoints_is_cached(self):
+        """Test that unchanged checkpoint files aren't parsed again."""
+        self.storage.save_checkpoint(Checkpoint(id=1))
+        self.storage.save_checkpoint(Checkpoint(id=2))
+        self._age_checkpoints_dir()
+        self.storage.list_checkpoints()
+
+        with patch.object(
+            self.storage, "_load_model", wraps=self.storage._load_model
+        ) as mock_load:
+            checkpoints = self.storage.list_checkpoints()
+        assert [c.id for c in checkpoints] == [1, 2]
+        assert mock_load.call_count == 0
+
+        self.storage.save_checkpoint(Checkpoint(id=3))
+        assert [c.id for c in self.storage.list_checkpoints()] == [1, 2, 3]
+
+    def test_list_checkpoints_keeps_timestamp_order(self):
+        """Test that cached listings are ordered by timestamp, not id."""
+        base = datetime(2024, 1, 1)
+        self.storage.save_checkpoint(Checkpoint(id=1, timestamp=base))
+        self.storage.save_checkpoint(Checkpoint(id=2, timestamp=base.replace(hour=2)))
+        self.storage.save_checkpoint(Checkpoint(id=3, timestamp=base.replace(hour=1)))
+        self._age_checkpoints_dir()
+        listed = self.storage.list_checkpoints()
+        listed.pop()
+
+        assert [c.id for c in listed] == [1, 3]
+        assert [c.id for c in self.storage.list_checkpoints()] == [1, 3, 2]
+
+    def test_list_checkpoints_distrusts_recent_directory(self):
+        """Test that a listing isn't cached while the directory mtime is recent."""
+        self.storage.save_checkpoint(Checkpoint(id=1))
+        mtime_ns = self.storage.checkpoints_dir.stat().st_mtime_ns
+        assert [c.id for c in self.storage.list_checkpoints()] == [1]
+
+        # Simulate a second write within the same coarse mtime tick
+        StorageManager(self.temp_dir).save_checkpoint(Checkpoint(id=2))
+        os.utime(self.storage.checkpoints_dir, ns=(mtime_ns, mtime_ns))
+
+        assert [c.id for c in self.storage.list_checkpoints()] == [1, 2]
+
+    def test_load_checkpoint_uses_listing_cache(self):
+        """Test that loads after a listing don't parse checkpoint files."""
+        self.storage.save_checkpoint(Checkpoint(id=1, description="first"))
+        self._age_checkpoints_dir()
+        self.storage.list_checkpoints()
+
+        with patch.object(
+            self.storage, "_load_model", wraps=self.storage._load_model
+        ) as mock_load:
+            assert self.storage.load_checkpoint(1).description == "first"
+            assert self.storage.load_checkpoint(2) is None
+        assert mock_load.call_count == 0
+
+        StorageManager(self.temp_dir).save_checkpoint(Checkpoint(id=2))
+        assert self.storage.load_checkpoint(2) is not None
+
+    def test_cached_checkpoints_are_shared_and_frozen(self):
+        """Test that cached checkpoints are returned as is and can't be changed."""
+        self.storage.save_checkpoint(Checkpoint(id=1, prompt=Prompt(content="one")))
+        self._age_checkpoints_dir()
+        listed = self.storage.list_checkpoints()[0]
+
+        assert self.storage.load_checkpoint(1) is listed
+        with pytest.raises(ValidationError):
+            listed.description = "changed"
+        with pytest.raises(ValidationError):
+            listed.prompt.content = "changed"
+
+    def test_list_checkpoints_sees_removed_files(self):
+        """Test that deleting a checkpoint file invalidates the cache."""
+        self.storage.save_checkpoint(Checkpoint(id=1))
+        self.storage.save_checkpoint(Checkpoint(id=2))
+        self._age_checkpoints_dir()
+        assert len(self.storage.list_checkpoints()) == 2
+
+        (self.storage.checkpoints_dir / "2.json").unlink()
+
+        assert [c.id for c in self.storage.list_checkpoints()] == [1]
+
+    def test_save_file_snapshot_skips_known_content(self):
+        """Test that already stored snapshots aren't written again."""
+        existing_hash = self.storage.save_file_snapshot("existing")
+        storage = StorageManager(self.temp_dir)
 
-        # Generate hash multiple times
-        hashes = [self.storage._get_file_hash(content) for _ in range(5)]
+        with patch("builtins.open", wraps=open) as mock_open:
+            assert storage.save_file_snapshot("existing") == existing_hash
+            new_hash = storage.save_file_snapshot("new")
+            assert storage.save_file_snapshot("new") == new_hash
+
+        assert mock_open.call_count == 1
+        assert storage.load_file_snapshot(new_hash) == "new"
+
+    def test_export_html_colors_diff_lines(self):
+        """Test that exported HTML diffs are escaped and colored per line."""
+        self.storage.save_checkpoint(Checkpoint(id=1, prompt=Prompt(content="one")))
+        self.storage.save_checkpoint(Checkpoint(id=2, prompt=Prompt(content="two")))
+        checkpoint_system = Mock()
+        checkpoint_system.compare_checkpoints.return_value = [
+            CodeChange(
+                file_path="main.py",
+                change_type="modified",
+                diff="@@ -1 +1 @@\n-a < b\n+a > b\n same",
+            )
+        ]
+        output_path = self.temp_dir / "export.html"
+
+        self.storage.export_data(output_path, ExportFormat.HTML, checkpoint_system)
+
+        assert (
+            '<span style="color: cyan;">@@ -1 +1 @@</span>\n'
+            '<span style="color: red;">-a &lt; b</span>\n'
+            '<span style="color: green;">+a &gt; b</span>\n'
+            " same"
+        ) in output_path.read_text()
+
+    def test_get_next_checkpoint_id(self):
+        """Test that the next id follows the highest checkpoint file."""
+        assert self.storage.get_next_checkpoint_id() == 1
+
+        self.storage.save_checkpoint(Checkpoint(id=1))
+        self.storage.save_checkpoint(Checkpoint(id=7))
+        (self.storage.checkpoints_dir / "notes.json").write_text("{}")
+        (self.storage.checkpoints_dir / "9.json.bak").write_text("{}")
+
+        assert self.storage.get_next_checkpoint_id() == 8
+
+    def test_get_next_checkpoint_id_uses_cache(self):
+        """Test that a current checkpoint cache avoids rescanning."""
+        self.storage.save_checkpoint(Checkpoint(id=2))
+        self.storage.save_checkpoint(Checkpoint(id=5))
+        self._age_checkpoints_dir()
+        self.storage.list_checkpoints()
+
+        with patch.object(
+            self.storage,
+            "_scan_checkpoint_files",
+            wraps=self.storage._scan_checkpoint_files,
+        ) as mock_scan:
+            assert self.storage.get_next_checkpoint_id() == 6
+
+        mock_scan.assert_not_called()
+
+    def test_get_next_checkpoint_id_after_restore_delete(self):
+        """Test that ids removed outside the storage manager can be reused."""
+        for checkpoint_id in (1, 2, 3):
+            self.storage.save_checkpoint(Checkpoint(id=checkpoint_id))
+        assert self.storage.get_next_checkpoint_id() == 4
+        self._age_checkpoints_dir()
+        self.storage.list_checkpoints()
+        assert self.storage.get_next_checkpoint_id() == 4
+
+        (self.storage.checkpoints_dir / "3.json").unlink()
+
+        assert self.storage.get_next_checkpoint_id() == 3
+
+    def test_list_checkpoints_parallel_load(self):
+        """Test listing enough checkpoints to load them on a thread pool."""
+        count = PARALLEL_LOAD_THRESHOLD + 4
+        for checkpoint_id in range(count, 0, -1):
+            self.storage.save_checkpoint(
+                Checkpoint(id=checkpoint_id, timestamp=datetime(2024, 1, checkpoint_id))
+            )
 
-        # All hashes should be identical
-        assert all(h == hashes[0] for h in hashes)
+        storage = StorageManager(self.temp_dir)
 
-    def test_json_save_with_datetime(self):
-        """Test JSON saving with datetime objects."""
-        test_data = {"timestamp": datetime.now(), "key": "value"}
-        file_path = self.temp_dir / "test_with_datetime.json"
+        assert [c.id for c in storage.list_checkpoints()] == list(range(1, count + 1))
+
+    def test_save_file_snapshot_leaves_no_temp_files(self):
+        """Test that snapshots are renamed into place, even after a failure."""
+        content_hash = self.storage.save_file_snapshot("content")
+
+        with (
+            patch("codesnap.storage.os.replace", side_effect=OSError("disk full")),
+            pytest.raises(OSError),
+        ):
+            self.storage.save_file_snapshot("other content")
+
+        assert not [
+            name
+            for _, _, names in os.walk(self.storage.files_dir)
+            for name in names
+            if name.startswith(".tmp-")
+        ]
+        assert self.storage.load_file_snapshot(content_hash) == "content"
+
+    def test_atomic_writes_use_umask_permissions(self):
+        """Test that new files get the umask's mode rather than 0600."""
+        old_umask = os.umask(0o027)
+        try:
+            content_hash = self.storage.save_file_snapshot("content")
+            self.storage.save_checkpoint(Checkpoint(id=1))
+        finally:
+            os.umask(old_umask)
+
+        for path in (
+            self.storage.snapshot_path(content_hash),
+            self.storage.checkpoints_dir / "1.json",
+        ):
+            assert stat.S_IMODE(path.stat().st_mode) == 0o640
+
+    def test_atomic_overwrite_keeps_permissions(self):
+        """Test that overwriting a checkpoint keeps the file's mode."""
+        self.storage.save_checkpoint(Checkpoint(id=1))
+        checkpoint_path = self.storage.checkpoints_dir / "1.json"
+        checkpoint_path.chmod(0o600)
+
+        self.storage.save_checkpoint(Checkpoint(id=1, description="second"))
+
+        assert stat.S_IMODE(checkpoint_path.stat().st_mode) == 0o600
+        assert self.storage.load_checkpoint(1).description == "second"
+
+    def test_save_file_snapshot_stores_utf8_bytes(self):
+        """Test that small and multi-window snapshots are stored as UTF-8."""
+        for content in ("café\r\n", "é" * (HASH_CHUNK_CHARS * 2 + 1)):
+            content_hash = self.storage.save_file_snapshot(content)
+
+            path = self.storage.snapshot_path(content_hash)
+            assert path.read_bytes() == content.encode()
+            assert content_hash == self.storage._get_file_hash(content)
+
+    def test_save_checkpoint_keeps_previous_version_on_failure(self):
+        """Test that a failed checkpoint write doesn't leave a torn file."""
+        self.storage.save_checkpoint(Checkpoint(id=1, description="first"))
+
+        with (
+            patch("codesnap.storage.os.replace", side_effect=OSError("disk full")),
+            pytest.raises(OSError),
+        ):
+            self.storage.save_checkpoint(Checkpoint(id=1, description="second"))
+
+        assert os.listdir(self.storage.checkpoints_dir) == ["1.json"]
+        assert StorageManager(self.temp_dir).load_checkpoint(1).description == "first"
+
+    def test_load_file_snapshot_translates_newlines(self):
+        """Test that snapshots load with text-mode newline translation."""
+        content_hash = self.storage.save_file_snapshot("a")
+        self.storage.snapshot_path(content_hash).write_bytes(b"a\r\nb\rc\n")
+
+        assert self.storage.load_file_snapshot(content_hash) == "a\nb\nc\n"
+
+    def test_file_snapshots_are_sharded(self):
+        """Test that snapshots live in hash-prefix subdirectories."""
+        content_hash = self.storage.save_file_snapshot("content")
+
+        path = self.storage.files_dir / content_hash[:2] / content_hash[2:]
+        assert self.storage.snapshot_path(content_hash) == path
+        assert path.read_text() == "content"
+        assert sorted(os.listdir(self.storage.files_dir)) == [
+            SHARDED_LAYOUT_MARKER,
+            content_hash[:2],
+        ]
+
+    def test_hash_file_matches_snapshot_hash(self):
+        """Test that hashing a file gives the hash of its saved snapshot."""
+        content = "caf\u00e9\n" * 20000
+        file_path = self.temp_dir / "file.txt"
+        file_path.write_bytes(content.encode())
+
+        assert self.storage.hash_file(file_path) == (
+            self.storage.save_file_snapshot(content)
+        )
+        file_path.write_bytes(b"other\n")
+        assert self.storage.hash_file(file_path) != (
+            self.storage.save_file_snapshot(content)
+        )
+
+    def test_flat_file_snapshots_are_moved_into_shards(self):
+        """Test that an unsharded store is read in place and moved on save."""
+        content_hash = self.storage._get_file_hash("content")
+        (self.storage.files_dir / SHARDED_LAYOUT_MARKER).unlink()
+        (self.storage.files_dir / content_hash).write_text("content")
+        # Stray files that aren't snapshots stay where they are
+        (self.storage.files_dir / "a").write_text("stray")
+        (self.storage.files_dir / "notes.txt").write_text("stray")
 
-        # Should not raise an exception
-        self.storage._save_json(file_path, test_data)
-        assert file_path.exists()
+        storage = StorageManager(self.temp_dir)
+        assert storage.load_file_snapshot(content_hash) == "content"
+        assert (storage.files_dir / content_hash).exists()
+        assert not (storage.files_dir / SHARDED_LAYOUT_MARKER).exists()
+
+        with patch.object(storage, "_write_atomic") as mock_write:
+            assert storage.save_file_snapshot("content") == content_hash
+        mock_write.assert_not_called()
+        assert not (storage.files_dir / content_hash).exists()
+        assert (storage.files_dir / SHARDED_LAYOUT_MARKER).exists()
+        assert (storage.files_dir / "a").read_text() == "stray"
+        assert (storage.files_dir / "notes.txt").read_text() == "stray"
+        assert StorageManager(self.temp_dir).load_file_snapshot(content_hash) == (
+            "content"
+        )
+
+    def test_export_gzip(self):
+        """Test that exports to a .gz path are compressed."""
+        self.storage.save_checkpoint(Checkpoint(id=1, description="initial"))
+        output_path = self.temp_dir / "export.html.gz"
+
+        self.storage.export_data(output_path, ExportFormat.HTML, Mock())
+
+        with gzip.open(output_path, "rt", encoding="utf-8") as f:
+            content = f.read()
+        assert content.startswith("<!DOCTYPE html>")
+        assert "initial" in content